@@ -1,51 +1,250 @@
 import argparse
+import collections
+import concurrent.futures
+import dataclasses
+import itertools
+import mmap
+import os
+import random
+import tempfile
+import time
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
 
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
-    parser.add_argument('input')
+    parser.add_argument('input', nargs='*')
+    parser.add_argument('--backend', choices=['python', 'numpy'], default='python')
+    parser.add_argument('--benchmark', type=int, metavar='READINGS', nargs='?', const=10 ** 8, default=None)
+    parser.add_argument('--workers', type=int, default=None)
 
-    return parser.parse_args()
+    args = parser.parse_args()
 
+    if not args.input and not args.benchmark:
+        parser.error('the following arguments are required: input')
 
-def compare_numbers(input_file):
-    with open(input_file) as input:
-        data = [int(d) for d in input.readlines()]
+    return args
 
-    increases = (
-        previous < current
-        for previous, current
-        in zip(data[:-1], data[1:])
-    )
 
-    return sum(increases)
+def _read_data(input_file) -> typing.Iterator[int]:
+    return (int(d) for d in input_reader.read_lines(input_file))
+
+
+def count_window_increases(
+    data: typing.Iterable[int],
+    window_widths: typing.Sequence[int],
+) -> typing.List[int]:
+    """
+    Count sliding window sum increases for each window width in one pass.
+
+    Neighbouring windows share all but one reading, so the sum of
+    data[i + 1: i + w + 1] is larger than the sum of data[i: i + w]
+    exactly when data[i + w] > data[i]. Only the last w + 1 readings
+    are ever kept.
+    """
+    window = collections.deque(maxlen=max(window_widths) + 1)
+    increases = [0] * len(window_widths)
+
+    for datum in data:
+        window.append(datum)
 
+        for idx, window_width in enumerate(window_widths):
+            if len(window) <= window_width:
+                continue
 
-def compare_triplets(input_file):
-    with open(input_file) as input:
-        data = [int(d) for d in input.readlines()]
+            if window[-1 - window_width] < datum:
+                increases[idx] += 1
 
-    window_width = 3
+    return increases
 
-    data_windowed = [
-        sum(data[i: i+window_width])
-        for i in range(len(data) + 1 - window_width)
+
+def _read_data_numpy(input_file) -> 'numpy.ndarray':
+    if numpy is None:
+        raise RuntimeError('numpy backend requires numpy to be installed')
+
+    return numpy.fromfile(input_file, dtype=numpy.int64, sep=' ')
+
+
+def count_window_increases_numpy(
+    data: 'numpy.ndarray',
+    window_widths: typing.Sequence[int],
+) -> typing.List[int]:
+    return [
+        int(numpy.count_nonzero(data[window_width:] > data[:-window_width]))
+        if window_width < len(data) else 0
+        for window_width in window_widths
     ]
 
-    increases = (
-        previous < current
-        for previous, current
-        in zip(data_windowed[:-1], data_windowed[1:])
+
+def count_increases(
+    input_file: str,
+    window_widths: typing.Sequence[int],
+    backend: str = 'python',
+) -> typing.List[int]:
+    if backend == 'numpy':
+        return count_window_increases_numpy(_read_data_numpy(input_file), window_widths)
+
+    return count_window_increases(_read_data(input_file), window_widths)
+
+
+@dataclasses.dataclass
+class ChunkSummary:
+    increases: typing.List[int]
+    head: typing.List[int]
+    tail: typing.List[int]
+
+
+def _summarise_chunk(
+    input_file: str,
+    range_start: int,
+    range_end: int,
+    window_widths: typing.Sequence[int],
+    backend: str = 'python',
+) -> ChunkSummary:
+    if backend == 'numpy' and numpy is None:
+        raise RuntimeError('numpy backend requires numpy to be installed')
+
+    with open(input_file, 'rb') as _input:
+        with mmap.mmap(_input.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if backend == 'numpy':
+                chunk = numpy.fromstring(data[range_start:range_end], dtype=numpy.int64, sep=' ')
+            else:
+                chunk = [int(d) for d in data[range_start:range_end].split()]
+
+    max_width = max(window_widths)
+
+    if backend == 'numpy':
+        return ChunkSummary(
+            increases=count_window_increases_numpy(chunk, window_widths),
+            head=chunk[:max_width].tolist(),
+            tail=chunk[-max_width:].tolist(),
+        )
+
+    return ChunkSummary(
+        increases=count_window_increases(chunk, window_widths),
+        head=chunk[:max_width],
+        tail=chunk[-max_width:],
     )
 
-    return sum(increases)
+
+def _stitch_chunks(
+    summaries: typing.Iterable[ChunkSummary],
+    window_widths: typing.Sequence[int],
+) -> typing.List[int]:
+    """
+    Merge chunk summaries, adding the window comparisons that cross chunks.
+
+    A reading in the first w positions of a chunk is compared with the
+    reading w positions earlier, which lives in the carried tail of the
+    readings seen so far.
+    """
+    max_width = max(window_widths)
+    increases = [0] * len(window_widths)
+    tail = []
+
+    for summary in summaries:
+        for idx, window_width in enumerate(window_widths):
+            increases[idx] += summary.increases[idx]
+
+            boundary = tail[-window_width:] + summary.head[:window_width]
+            increases[idx] += sum(
+                boundary[i] < boundary[i + window_width]
+                for i in range(len(boundary) - window_width)
+            )
+
+        tail = (tail + summary.tail)[-max_width:]
+
+    return increases
+
+
+def count_increases_parallel(
+    input_files: typing.Sequence[str],
+    window_widths: typing.Sequence[int],
+    workers: typing.Optional[int] = None,
+    chunk_size: int = 64 * 1024 * 1024,
+    backend: str = 'python',
+) -> typing.List[int]:
+    """
+    Count window increases over the concatenation of input_files, with
+    line-aligned chunks of every file counted in a process pool.
+    """
+    chunks = [
+        (input_file, range_start, range_end)
+        for input_file in input_files
+        for range_start, range_end in input_reader.chunk_ranges(input_file, chunk_size)
+    ]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        summaries = executor.map(
+            _summarise_chunk,
+            *zip(*chunks),
+            itertools.repeat(window_widths),
+            itertools.repeat(backend),
+        ) if chunks else []
+
+        return _stitch_chunks(summaries, window_widths)
+
+
+def benchmark(readings: int, window_widths: typing.Sequence[int] = (1, 3)) -> None:
+    backends = ['python'] + (['numpy'] if numpy is not None else [])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, 'depths.txt')
+
+        with open(input_file, 'w') as _output:
+            depth = 0
+            for _ in range(readings):
+                depth = max(0, depth + random.randint(-10, 10))
+                _output.write(f'{depth}\n')
+
+        for backend in backends:
+            start = time.perf_counter()
+            result = count_increases(input_file, window_widths, backend)
+            elapsed = time.perf_counter() - start
+
+            print(f'{backend} - {readings} readings, {elapsed:.3f}s, increases - {result}')
+
+
+def compare_numbers(input_file):
+    increases, = count_window_increases(_read_data(input_file), [1])
+
+    return increases
+
+
+def compare_triplets(input_file, window_width=3):
+    increases, = count_window_increases(_read_data(input_file), [window_width])
+
+    return increases
 
 
 if __name__ == '__main__':
     args = parse_args()
-    result = compare_numbers(args.input)
-    print('Number of record increases', result)
 
-    result = compare_triplets(args.input)
-    print('Number of triplet increases', result)
+    if args.benchmark:
+        benchmark(args.benchmark)
+        raise SystemExit
+
+    if args.workers or len(args.input) > 1:
+        record_increases, triplet_increases = count_increases_parallel(
+            args.input,
+            [1, 3],
+            args.workers,
+            backend=args.backend,
+        )
+    else:
+        record_increases, triplet_increases = count_increases(
+            args.input[0],
+            [1, 3],
+            args.backend,
+        )
+
+    print('Number of record increases', record_increases)
+    print('Number of triplet increases', triplet_increases)
@@ -1,6 +1,8 @@
 import argparse
 import typing
 
+import input_reader
+
 
 BRACKETS = [
     ('(', ')'),
@@ -32,11 +34,8 @@ def parse_args():
     return parser.parse_args()
 
 
-def _read_data(input_file) -> typing.List[str]:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
-
-    return lines
+def _read_data(input_file) -> typing.Iterator[str]:
+    return input_reader.read_lines(input_file)
 
 
 def line_parse(line: str) -> (str, str, str):
@@ -4,6 +4,8 @@ import itertools
 import json
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -101,8 +103,7 @@ class Field:
 
 
 def _read_data(input_file) -> Field:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     octopi = []
 
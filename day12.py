@@ -2,6 +2,8 @@ import argparse
 import json
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -15,8 +17,7 @@ def _read_data(input_file) -> typing.Dict[str, str]:
     """
     Return incidence map
     """
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     incidence_map = {}
 
@@ -1,6 +1,8 @@
 import argparse
 import re
 
+import input_reader
+
 
 class Image:
     def __init__(self):
@@ -64,16 +66,13 @@ def _read_data(input_file):
     """
     Return incidence map
     """
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     image = Image()
-    instructions_start = 0
     instructions = []
 
-    for idx, line in enumerate(lines):
+    for line in lines:
         if line == '':
-            instructions_start = idx + 1
             break
 
         x, y = line.split(',')
@@ -82,7 +81,7 @@ def _read_data(input_file):
 
         image.add_dot(x, y, '#')
 
-    for line in lines[instructions_start:]:
+    for line in lines:
         instructions.append(line)
 
     return image, instructions
@@ -4,6 +4,8 @@ import datetime
 import re
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -18,14 +20,15 @@ def _read_data(input_file):
     Return incidence map
     """
 
-    with open(input_file) as _input:
-        input_lines = _input.read().splitlines()
+    input_lines = input_reader.read_lines(input_file)
 
-    polymer = input_lines[0]
+    polymer = next(input_lines)
+    # skip the separator line
+    next(input_lines)
 
     rules = {}
 
-    for line in input_lines[2:]:
+    for line in input_lines:
         pattern = re.compile(r'(.*) -> (.*)')
         chain, product = pattern.match(line).groups()
 
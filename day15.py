@@ -5,6 +5,8 @@ import heapq
 import re
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -15,8 +17,7 @@ def parse_args():
 
 
 def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     cavern = []
 
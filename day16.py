@@ -8,6 +8,8 @@ import typing
 
 from dataclasses import dataclass
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -18,12 +20,11 @@ def parse_args():
 
 
 def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     translated_input = ''.join([
         bit
-        for char in lines[0]
+        for char in next(lines)
         for bit in format(int(char, 16), '04b')
     ])
 
@@ -2,6 +2,8 @@ import argparse
 import itertools
 import re
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -16,10 +18,9 @@ def _parse_goal_coordinates(coords):
 
 
 def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
-    instruction = lines[0]
+    instruction = next(lines)
     pattern = re.compile(r'target area: x=(.*), y=(.*)')
     x, y = pattern.match(instruction).groups()
 
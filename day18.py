@@ -6,6 +6,8 @@ import typing
 
 from dataclasses import dataclass
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -46,8 +48,7 @@ def _read_number(number_str) -> typing.Tuple['Number', str]:
 
 
 def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     numbers = []
 
@@ -5,6 +5,8 @@ import typing
 
 from dataclasses import dataclass
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -15,15 +17,13 @@ def parse_args():
 
 
 def _read_data(input_file) -> typing.List['Scanner']:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     scanners = []
 
     scanner_pattern = re.compile(r'-* scanner (\d*) ---')
 
-    while lines:
-        next_line = lines.pop(0)
+    for next_line in lines:
         scanner_id = scanner_pattern.match(next_line).group(0)
         new_scanner = Scanner(
             id=scanner_id,
@@ -31,17 +31,16 @@ def _read_data(input_file) -> typing.List['Scanner']:
             beacons=[]
         )
 
-        while lines and lines[0] != '':
-            next_line = lines.pop(0)
+        # beacons run until the empty line separating scanners
+        for next_line in lines:
+            if next_line == '':
+                break
+
             x, y, z = next_line.split(',')
 
             new_scanner.beacons.append(
                 Beacon(int(x), int(y), int(z))
             )
-        else:
-            # remove empty line
-            if lines:
-                lines.pop(0)
 
         scanners.append(new_scanner)
 
@@ -1,12 +1,24 @@
 import argparse
+import array
+import concurrent.futures
 import dataclasses
+import itertools
 import typing
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--columnar', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
 
     return parser.parse_args()
 
@@ -74,10 +86,322 @@ def read_input(input_file: str) -> typing.List[Movement]:
             distance=int(distance)
         )
 
-    with open(input_file) as input_data:
-        data = input_data.readlines()
+    return [read_movement(d) for d in input_reader.read_lines(input_file)]
+
+
+DIRECTION_CODES = {
+    'forward': 0,
+    'down': 1,
+    'up': 2,
+}
+
+
+@dataclasses.dataclass
+class Course:
+    """
+    Columnar instructions: one direction code and one distance per movement
+    """
+    directions: array.array
+    distances: array.array
+
+    def __len__(self) -> int:
+        return len(self.directions)
+
+
+def read_course(
+    input_file: str,
+    range_start: int = 0,
+    range_end: typing.Optional[int] = None,
+) -> Course:
+    directions = array.array('b')
+    distances = array.array('q')
+
+    for line in input_reader.read_lines(input_file, range_start, range_end):
+        direction, distance = line.split(' ')
+
+        directions.append(DIRECTION_CODES[direction])
+        distances.append(int(distance))
+
+    return Course(directions, distances)
+
+
+INT64_MAX = 2 ** 63 - 1
+
+
+def _int64_fits(course: Course, current_aim: int = 0) -> bool:
+    """
+    Whether every aim, distance and depth along the course fits int64
+    """
+    if not len(course):
+        return True
+
+    if numpy is not None:
+        distances = numpy.frombuffer(course.distances, dtype=numpy.int64)
+        min_distance, max_distance = int(distances.min()), int(distances.max())
+    else:
+        min_distance, max_distance = min(course.distances), max(course.distances)
+
+    # neither the aim nor the distance moves further than the sum of all distances
+    total = len(course) * max(-min_distance, max_distance)
+
+    return (abs(current_aim) + total) * total <= INT64_MAX
+
+
+def _numpy_fits(course: Course, current_aim: int = 0) -> bool:
+    return numpy is not None and _int64_fits(course, current_aim)
+
+
+def _course_columns(course: Course, use_numpy: bool):
+    """
+    Return (forward, aim change) columns, as numpy arrays if use_numpy is set
+    """
+    if use_numpy:
+        directions = numpy.frombuffer(course.directions, dtype=numpy.int8)
+        distances = numpy.frombuffer(course.distances, dtype=numpy.int64)
+
+        forward = numpy.where(directions == DIRECTION_CODES['forward'], distances, 0)
+        aim_change = (
+            numpy.where(directions == DIRECTION_CODES['down'], distances, 0)
+            - numpy.where(directions == DIRECTION_CODES['up'], distances, 0)
+        )
+
+        return forward, aim_change
+
+    forward_code = DIRECTION_CODES['forward']
+    aim_signs = {
+        DIRECTION_CODES['forward']: 0,
+        DIRECTION_CODES['down']: 1,
+        DIRECTION_CODES['up']: -1,
+    }
+
+    forward = [
+        distance if direction == forward_code else 0
+        for direction, distance in zip(course.directions, course.distances)
+    ]
+    aim_change = [
+        aim_signs[direction] * distance
+        for direction, distance in zip(course.directions, course.distances)
+    ]
+
+    return forward, aim_change
+
+
+def _column_sum(column) -> int:
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return int(column.sum())
+
+    return sum(column)
+
+
+def _aim_depth_change(forward, aim_change, current_aim: int) -> int:
+    if numpy is not None and isinstance(forward, numpy.ndarray):
+        aim = numpy.cumsum(aim_change) + current_aim
+
+        return int(numpy.dot(aim, forward))
+
+    aim = itertools.accumulate(aim_change, initial=current_aim)
+    next(aim)
+
+    return sum(a * f for a, f in zip(aim, forward))
+
+
+def course_position_no_aim(course: Course, current_position: Position) -> Position:
+    forward, depth_change = _course_columns(course, _numpy_fits(course))
+
+    return Position(
+        depth=current_position.depth + _column_sum(depth_change),
+        distance=current_position.distance + _column_sum(forward),
+    )
+
+
+def course_position_with_aim(course: Course, current_position: Position, current_aim: int) -> Position:
+    """
+    The aim is the running sum of up/down moves, and every forward move adds
+    aim * distance to the depth.
+    """
+    forward, aim_change = _course_columns(course, _numpy_fits(course, current_aim))
+
+    return Position(
+        depth=current_position.depth + _aim_depth_change(forward, aim_change, current_aim),
+        distance=current_position.distance + _column_sum(forward),
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class CourseSummary:
+    """
+    Net effect of a run of movements from zero aim, composable in order
+    """
+    aim: int = 0
+    distance: int = 0
+    depth: int = 0
+
+    def compose(self, other: 'CourseSummary') -> 'CourseSummary':
+        return CourseSummary(
+            aim=self.aim + other.aim,
+            distance=self.distance + other.distance,
+            depth=self.depth + other.depth + self.aim * other.distance,
+        )
+
+
+def summarise_movement(movement: Movement) -> CourseSummary:
+    if movement.direction == 'up':
+        return CourseSummary(aim=-movement.distance)
+    elif movement.direction == 'down':
+        return CourseSummary(aim=movement.distance)
+    elif movement.direction == 'forward':
+        return CourseSummary(distance=movement.distance)
+
+    return CourseSummary()
+
+
+def summarise_course(course: Course) -> CourseSummary:
+    forward, aim_change = _course_columns(course, _numpy_fits(course))
+
+    return CourseSummary(
+        aim=_column_sum(aim_change),
+        distance=_column_sum(forward),
+        depth=_aim_depth_change(forward, aim_change, current_aim=0),
+    )
+
+
+def _summarise_course_range(input_file: str, range_start: int, range_end: int) -> CourseSummary:
+    return summarise_course(read_course(input_file, range_start, range_end))
+
+
+class SubSegmented(Sub):
+    """
+    Aim model sub whose state is a CourseSummary, so it can be checkpointed
+    """
+    def __init__(self, current_position: Position, current_aim: int):
+        self._summary = CourseSummary(
+            aim=current_aim,
+            distance=current_position.distance,
+            depth=current_position.depth,
+        )
 
-    return [read_movement(d) for d in data]
+    @classmethod
+    def from_checkpoint(cls, summary: CourseSummary) -> 'SubSegmented':
+        sub = cls(Position(depth=0, distance=0), current_aim=0)
+        sub._summary = summary
+
+        return sub
+
+    def checkpoint(self) -> CourseSummary:
+        return self._summary
+
+    def move(self, movement: Movement):
+        self._summary = self._summary.compose(summarise_movement(movement))
+
+    def move_course(self, course: Course):
+        self._summary = self._summary.compose(summarise_course(course))
+
+    def move_input(
+        self,
+        input_file: str,
+        workers: typing.Optional[int] = None,
+        chunk_size: int = 16 * 1024 * 1024,
+    ):
+        """
+        Follow the course in input_file, summarising byte ranges on workers
+        """
+        chunks = input_reader.chunk_ranges(input_file, chunk_size)
+
+        if not chunks:
+            return
+
+        range_starts, range_ends = zip(*chunks)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = executor.map(
+                _summarise_course_range,
+                itertools.repeat(input_file),
+                range_starts,
+                range_ends,
+            )
+
+            for summary in summaries:
+                self._summary = self._summary.compose(summary)
+
+    def current_aim(self) -> int:
+        return self._summary.aim
+
+    def current_position(self) -> Position:
+        return Position(
+            depth=self._summary.depth,
+            distance=self._summary.distance,
+        )
+
+
+class CourseIndex:
+    """
+    Prefix sums of aim, distance and depth at every stride-th step of a course
+    """
+    def __init__(self, course: Course, stride: int = 1):
+        self._course = course
+        self._stride = stride
+
+        # the prefixes are built one step at a time, which plain lists do fastest
+        forward, aim_change = _course_columns(course, use_numpy=False)
+
+        # prefixes outside of int64 are kept as Python ints
+        prefix = (lambda: array.array('q', [0])) if _int64_fits(course) else (lambda: [0])
+
+        self._aim = prefix()
+        self._distance = prefix()
+        self._depth = prefix()
+
+        aim, distance, depth = 0, 0, 0
+
+        for step, (step_forward, step_aim) in enumerate(zip(forward, aim_change), start=1):
+            aim += step_aim
+            distance += step_forward
+            depth += aim * step_forward
+
+            if step % stride == 0:
+                self._aim.append(aim)
+                self._distance.append(distance)
+                self._depth.append(depth)
+
+    def __len__(self) -> int:
+        return len(self._course)
+
+    def summary_at(self, step: int) -> CourseSummary:
+        if not 0 <= step <= len(self):
+            raise IndexError(f'step {step} is outside of the course')
+
+        checkpoint, replay = divmod(step, self._stride)
+
+        summary = CourseSummary(
+            aim=self._aim[checkpoint],
+            distance=self._distance[checkpoint],
+            depth=self._depth[checkpoint],
+        )
+
+        if replay:
+            replay_start = checkpoint * self._stride
+            summary = summary.compose(summarise_course(Course(
+                self._course.directions[replay_start: step],
+                self._course.distances[replay_start: step],
+            )))
+
+        return summary
+
+    def position_no_aim(self, step: int) -> Position:
+        summary = self.summary_at(step)
+
+        return Position(depth=summary.aim, distance=summary.distance)
+
+    def position_with_aim(self, step: int) -> Position:
+        summary = self.summary_at(step)
+
+        return Position(depth=summary.depth, distance=summary.distance)
+
+    def positions_no_aim(self, steps: typing.Iterable[int]) -> typing.List[Position]:
+        return [self.position_no_aim(step) for step in steps]
+
+    def positions_with_aim(self, steps: typing.Iterable[int]) -> typing.List[Position]:
+        return [self.position_with_aim(step) for step in steps]
 
 
 def move_sub(sub: Sub, instructions: typing.List[Movement]) -> Position:
@@ -87,24 +411,64 @@ def move_sub(sub: Sub, instructions: typing.List[Movement]) -> Position:
     return sub.current_position()
 
 
-def run(input_file):
-    instructions = read_input(input_file)
+def run_columnar(input_file):
+    course = read_course(input_file)
+
+    final_position = course_position_no_aim(course, Position(depth=0, distance=0))
+    print('No aim position:', final_position.distance * final_position.depth)
+
+    final_position = course_position_with_aim(course, Position(depth=0, distance=0), current_aim=0)
+    print('With aim position:', final_position.distance * final_position.depth)
+
+
+def run_segmented(input_file, workers):
+    sub = SubSegmented(
+        current_position=Position(depth=0, distance=0),
+        current_aim=0,
+    )
+    sub.move_input(input_file, workers)
 
+    # without aim the depth is what the aim ends up at
+    summary = sub.checkpoint()
+    print('No aim position:', summary.distance * summary.aim)
+
+    final_position = sub.current_position()
+    print('With aim position:', final_position.distance * final_position.depth)
+
+
+def final_position_no_aim(instructions: typing.List[Movement]) -> Position:
     sub_no_aim = SubNoAim(
         current_position=Position(depth=0, distance=0)
     )
 
-    final_position = move_sub(sub_no_aim, instructions)
-    print('No aim position:', final_position.distance * final_position.depth)
+    return move_sub(sub_no_aim, instructions)
+
 
+def final_position_with_aim(instructions: typing.List[Movement]) -> Position:
     sub_with_aim = SubWithAim(
         current_position=Position(depth=0, distance=0),
         current_aim=0,
     )
-    final_position = move_sub(sub_with_aim, instructions)
+
+    return move_sub(sub_with_aim, instructions)
+
+
+def run(input_file):
+    instructions = read_input(input_file)
+
+    final_position = final_position_no_aim(instructions)
+    print('No aim position:', final_position.distance * final_position.depth)
+
+    final_position = final_position_with_aim(instructions)
     print('With aim position:', final_position.distance * final_position.depth)
 
 
 if __name__ == '__main__':
     args = parse_args()
-    run(args.input)
+
+    if args.workers:
+        run_segmented(args.input, args.workers)
+    elif args.columnar:
+        run_columnar(args.input)
+    else:
+        run(args.input)
@@ -5,6 +5,8 @@ import typing
 
 from dataclasses import dataclass
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -15,17 +17,18 @@ def parse_args():
 
 
 def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
-    rewrite_map = lines[0]
+    rewrite_map = next(lines)
+    # skip the separator line
+    next(lines)
 
     image = [
         ''.join([
             pixel
             for x, pixel in enumerate(line)
         ])
-        for y, line in enumerate(lines[2:])
+        for y, line in enumerate(lines)
     ]
 
     return rewrite_map, image
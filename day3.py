@@ -1,98 +1,233 @@
 import argparse
+import array
+import bisect
+import dataclasses
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
 
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--bit-sliced', action='store_true')
 
     return parser.parse_args()
 
 
-def _read_data(input_file):
-    with open(input_file) as _input:
-        data = _input.read().splitlines()
+@dataclasses.dataclass
+class Reports:
+    """
+    Diagnostic reports packed into integers, most significant bit first
+    """
+    values: typing.Union[array.array, typing.List[int]]
+    width: int
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def read_reports(input_file) -> Reports:
+    lines = input_reader.read_lines(input_file)
+
+    first_line = next(lines)
+    width = len(first_line)
+
+    # words that fit a machine integer are stored 8 bytes per report
+    values = array.array('Q') if width <= 64 else []
+    values.append(int(first_line, 2))
+
+    for line in lines:
+        values.append(int(line, 2))
+
+    return Reports(values, width)
+
 
-    return data
+@dataclasses.dataclass
+class BitSlicedReports:
+    """
+    Diagnostic reports stored by bit column, most significant column first.
 
+    Bit i of a column is the digit of the i-th report, so a whole column is
+    counted or masked with a single integer operation.
+    """
+    columns: typing.List[int]
+    count: int
 
-def _get_common_digit(data, digit_position):
-    digits_occurence = {'0': 0, '1': 0}
+    def __len__(self) -> int:
+        return self.count
 
-    for datum in data:
-        digit = datum[digit_position]
-        digits_occurence[digit] += 1
+    @property
+    def width(self) -> int:
+        return len(self.columns)
 
-    most_common_digit = (
-        '1'
-        if digits_occurence['1'] >= digits_occurence['0']
-        else '0'
-    )
+    def report(self, report_idx: int) -> int:
+        value = 0
 
-    return most_common_digit
+        for column in self.columns:
+            value = (value << 1) | ((column >> report_idx) & 1)
 
+        return value
 
-def calculate_power_rate(input_file):
-    data = _read_data(input_file)
-    datum_length = len(data[0])
 
-    common_digits = []
+def read_bit_sliced_reports(input_file) -> BitSlicedReports:
+    lines = list(input_reader.read_lines(input_file))
 
-    for digit_position in range(datum_length):
-        common_digit = _get_common_digit(data, digit_position)
-        common_digits.append(common_digit)
+    # the first report ends up in the least significant bit of each column
+    columns = [
+        int(''.join(reversed(column)), 2)
+        for column in zip(*lines)
+    ]
 
-    gamma_rate = ''.join(common_digits)
-    gamma_rate = int(gamma_rate, 2)
+    return BitSlicedReports(columns, len(lines))
 
-    epsilon_rate_mask = int('1' * datum_length, 2)
+
+def count_bits(reports: typing.Union[Reports, BitSlicedReports]) -> typing.List[int]:
+    """
+    Count the reports with a 1 at each bit position, most significant first
+    """
+    if isinstance(reports, BitSlicedReports):
+        return [column.bit_count() for column in reports.columns]
+
+    shifts = range(reports.width - 1, -1, -1)
+
+    if numpy is not None and isinstance(reports.values, array.array):
+        values = numpy.frombuffer(reports.values, dtype=numpy.uint64)
+
+        return [
+            int(numpy.count_nonzero(values & numpy.uint64(1 << shift)))
+            for shift in shifts
+        ]
+
+    return [
+        sum((value >> shift) & 1 for value in reports.values)
+        for shift in shifts
+    ]
+
+
+def power_rate(reports: typing.Union[Reports, BitSlicedReports]) -> int:
+    gamma_rate = 0
+
+    for ones_count in count_bits(reports):
+        # ties go to 1
+        common_digit = 1 if ones_count * 2 >= len(reports) else 0
+        gamma_rate = (gamma_rate << 1) | common_digit
+
+    epsilon_rate_mask = (1 << reports.width) - 1
     epsilon_rate = gamma_rate ^ epsilon_rate_mask
 
     return gamma_rate * epsilon_rate
 
 
-def _oxygen_generator_filter(digit_position, common_digit):
-    def filter(datum):
-        return datum[digit_position] == common_digit
-    return filter
+def calculate_power_rate(input_file, bit_sliced=False):
+    reports = read_bit_sliced_reports(input_file) if bit_sliced else read_reports(input_file)
+
+    return power_rate(reports)
 
 
-def _oxygen_scrubber_filter(digit_position, common_digit):
-    def filter(datum):
-        return datum[digit_position] != common_digit
-    return filter
+def _oxygen_generator_criteria(zeros_count, ones_count):
+    return 1 if ones_count >= zeros_count else 0
 
 
-def _calculate_oxy_rate(filter_producer, data):
-    datum_length = len(data[0])
+def _oxygen_scrubber_criteria(zeros_count, ones_count):
+    return 0 if ones_count >= zeros_count else 1
 
-    for digit_position in range(datum_length):
-        common_digit = _get_common_digit(data, digit_position)
 
-        rate_filter = filter_producer(digit_position, common_digit)
+def _calculate_oxy_rate(bit_criteria, sorted_values, width):
+    """
+    Narrow a range of sorted reports one bit at a time.
 
-        data = filter(rate_filter, data)
-        data = list(data)
+    All reports in the range share the bits decided so far, so the ones with
+    a 1 at the next position form the upper part of the range, and the split
+    point is found with a binary search.
+    """
+    range_start, range_end = 0, len(sorted_values)
 
-        if len(data) == 1:
+    for shift in range(width - 1, -1, -1):
+        prefix = sorted_values[range_start] >> (shift + 1) << (shift + 1)
+        split = bisect.bisect_left(
+            sorted_values,
+            prefix | (1 << shift),
+            range_start,
+            range_end,
+        )
+
+        kept_digit = bit_criteria(split - range_start, range_end - split)
+
+        if kept_digit:
+            range_start = split
+        else:
+            range_end = split
+
+        if range_start == range_end:
+            raise ValueError('no report matches the bit criteria')
+
+        if range_end - range_start == 1:
             break
 
-    return int(data[0], 2)
+    return sorted_values[range_start]
+
 
+def _calculate_oxy_rate_bit_sliced(bit_criteria, reports: BitSlicedReports):
+    """
+    Narrow a bitmask of remaining reports one column at a time
+    """
+    remaining = (1 << len(reports)) - 1
+    remaining_count = len(reports)
 
-def calculate_support_rating(input_file):
-    data = _read_data(input_file)
+    for column in reports.columns:
+        ones = column & remaining
+        ones_count = ones.bit_count()
+
+        if bit_criteria(remaining_count - ones_count, ones_count):
+            remaining = ones
+        else:
+            remaining = remaining & ~column
+
+        remaining_count = remaining.bit_count()
+
+        if remaining_count == 0:
+            raise ValueError('no report matches the bit criteria')
+
+        if remaining_count == 1:
+            break
 
-    generator_rate = _calculate_oxy_rate(_oxygen_generator_filter, data)
-    scrubber_rate = _calculate_oxy_rate(_oxygen_scrubber_filter, data)
+    first_remaining = (remaining & -remaining).bit_length() - 1
+
+    return reports.report(first_remaining)
+
+
+def support_rating(reports: typing.Union[Reports, BitSlicedReports]) -> int:
+    if isinstance(reports, BitSlicedReports):
+        generator_rate = _calculate_oxy_rate_bit_sliced(_oxygen_generator_criteria, reports)
+        scrubber_rate = _calculate_oxy_rate_bit_sliced(_oxygen_scrubber_criteria, reports)
+
+        return generator_rate * scrubber_rate
+
+    sorted_values = sorted(reports.values)
+
+    generator_rate = _calculate_oxy_rate(_oxygen_generator_criteria, sorted_values, reports.width)
+    scrubber_rate = _calculate_oxy_rate(_oxygen_scrubber_criteria, sorted_values, reports.width)
 
     return generator_rate * scrubber_rate
 
 
+def calculate_support_rating(input_file, bit_sliced=False):
+    reports = read_bit_sliced_reports(input_file) if bit_sliced else read_reports(input_file)
+
+    return support_rating(reports)
+
+
 if __name__ == '__main__':
     args = parse_args()
-    result = calculate_power_rate(args.input)
+    result = calculate_power_rate(args.input, args.bit_sliced)
     print('power consumption rate', result)
 
-    result = calculate_support_rating(args.input)
+    result = calculate_support_rating(args.input, args.bit_sliced)
     print('life support rating', result)
@@ -1,14 +1,26 @@
 import argparse
+import array
+import collections
 import dataclasses
 import itertools
+import math
 
 import typing
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--ranking', action='store_true')
+    parser.add_argument('--compact', action='store_true')
 
     return parser.parse_args()
 
@@ -19,70 +31,103 @@ class BingoCell:
     marked: bool
 
 
-def _read_data(input_file):
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+def _read_boards(
+    lines: typing.Iterator[str],
+    compact: bool = False,
+) -> typing.Iterator[typing.Union['BingoBoard', 'ArrayBingoBoard']]:
+    """
+    Yield boards one at a time, each one as soon as its blank line or the
+    end of the input is reached
+    """
+    board_store = BingoBoardStore() if compact else None
+    board_lines = []
+
+    def build_board():
+        if board_store is not None:
+            return board_store.add_board(board_lines)
+
+        return BingoBoard([
+            [BingoCell(number, False) for number in numbers]
+            for numbers in board_lines
+        ])
+
+    for line in lines:
+        if line == '':
+            if board_lines:
+                yield build_board()
+                board_lines = []
 
-    game_numbers = lines.pop(0)
-    game_numbers = (int(number) for number in game_numbers.split(','))
+            continue
 
-    boards = []
+        board_lines.append([int(number) for number in line.split()])
 
-    while len(lines) > 0:
-        board_lines = []
+    if board_lines:
+        yield build_board()
 
-        for line in lines[1:6]:
-            numbers = [int(number) for number in line.split(' ') if number != '']
-            board_line = [BingoCell(number, False) for number in numbers]
-            board_lines.append(board_line)
 
-        new_board = BingoBoard(board_lines)
-        boards.append(new_board)
+def _stream_data(input_file, compact=False):
+    lines = input_reader.read_lines(input_file)
 
-        lines = lines[6:]
+    game_numbers = next(lines)
+    game_numbers = [int(number) for number in game_numbers.split(',')]
 
-    return game_numbers, boards
+    return game_numbers, _read_boards(lines, compact)
+
+
+def _read_data(input_file, compact=False):
+    game_numbers, boards = _stream_data(input_file, compact)
+
+    return game_numbers, list(boards)
 
 
 class BingoBoard:
     def __init__(self, board: typing.List[typing.List[BingoCell]]):
         self.board = board
 
+        self._row_hits = [0] * len(board)
+        self._column_hits = [0] * len(board[0])
+        self._won = False
+
+        for row, column in itertools.product(range(len(board)), range(len(board[0]))):
+            if board[row][column].marked:
+                self._count_hit(row, column)
+
     def print(self):
-        for row in self.board:
-            print([cell.number for cell in row])
+        for row in self.numbers():
+            print(row)
 
-    def mark_a_number(self, number: int):
-        cells = (cell for row in self.board for cell in row)
+    def numbers(self) -> typing.List[typing.List[int]]:
+        return [[cell.number for cell in row] for row in self.board]
 
-        for cell in cells:
-            if cell.number == number:
-                cell.marked = True
-                return
+    def _count_hit(self, row: int, column: int):
+        self._row_hits[row] += 1
+        self._column_hits[column] += 1
 
-    @staticmethod
-    def _board_is_won(cells: typing.List[BingoCell]) -> bool:
-        return all(cell.marked for cell in cells)
+        if (
+            self._row_hits[row] == len(self._column_hits)
+            or
+            self._column_hits[column] == len(self._row_hits)
+        ):
+            self._won = True
 
-    def is_won(self) -> bool:
-        board_size = len(self.board)
-        rows = range(board_size)
-        columns = range(board_size)
+    def mark_cell(self, row: int, column: int):
+        cell = self.board[row][column]
 
-        row_cells = (
-            [self.board[row][column] for column in columns]
-            for row in rows
-        )
+        if cell.marked:
+            return
 
-        column_cells = (
-            [self.board[row][column] for row in rows]
-            for column in columns
-        )
+        cell.marked = True
+        self._count_hit(row, column)
 
-        return any(
-            self._board_is_won(cells)
-            for cells in itertools.chain(row_cells, column_cells)
-        )
+    def mark_a_number(self, number: int):
+        for row, board_row in enumerate(self.board):
+            for column, cell in enumerate(board_row):
+                if cell.number == number:
+                    self.mark_cell(row, column)
+                    return
+
+    def is_won(self) -> bool:
+        return self._won
 
     def get_marked_numbers(self) -> typing.List[int]:
         cells = (cell for row in self.board for cell in row)
@@ -93,21 +138,202 @@ class BingoBoard:
         return [cell.number for cell in cells if not cell.marked]
 
 
-def play_bingo(input_file):
-    numbers, boards = _read_data(input_file)
+class BingoBoardStore:
+    """
+    All boards of a game packed into one flat (board, row, column) array of
+    numbers, with one bitmask of marked cells per board
+    """
+    def __init__(self):
+        self.rows = 0
+        self.columns = 0
+        self.numbers = array.array('q')
+        self.marked = array.array('Q')
+
+        self._line_masks = []
+
+    def __len__(self) -> int:
+        return len(self.marked)
+
+    def __getitem__(self, board_idx: int) -> 'ArrayBingoBoard':
+        return ArrayBingoBoard(self, board_idx)
+
+    @property
+    def board_size(self) -> int:
+        return self.rows * self.columns
+
+    def add_board(self, numbers: typing.List[typing.List[int]]) -> 'ArrayBingoBoard':
+        if not self._line_masks:
+            self.rows = len(numbers)
+            self.columns = len(numbers[0])
+
+            if self.board_size > 64:
+                # marks no longer fit a machine integer
+                self.marked = list(self.marked)
+
+            row_mask = (1 << self.columns) - 1
+            column_mask = sum(1 << (row * self.columns) for row in range(self.rows))
+
+            self._line_masks = (
+                [row_mask << (row * self.columns) for row in range(self.rows)]
+                + [column_mask << column for column in range(self.columns)]
+            )
+
+        if len(numbers) != self.rows or any(len(row) != self.columns for row in numbers):
+            raise ValueError('all boards in a store must have the same size')
+
+        for row in numbers:
+            self.numbers.extend(row)
+
+        self.marked.append(0)
+
+        return self[len(self) - 1]
+
+    def board_numbers(self, board_idx: int) -> typing.Sequence[int]:
+        board_start = board_idx * self.board_size
+
+        return self.numbers[board_start: board_start + self.board_size]
+
+    def is_won(self, board_idx: int) -> bool:
+        marked = self.marked[board_idx]
+
+        return any(marked & mask == mask for mask in self._line_masks)
+
+    def numbers_as_numpy(self) -> 'numpy.ndarray':
+        """
+        Return a numpy view of the numbers, shaped (board, row, column)
+        """
+        if numpy is None:
+            raise RuntimeError('numpy views require numpy to be installed')
+
+        numbers = numpy.frombuffer(self.numbers, dtype=numpy.int64)
+
+        return numbers.reshape(len(self), self.rows, self.columns)
+
+    def as_numpy(self):
+        """
+        Return (numbers, marked) numpy views, numbers shaped (board, row, column)
+        """
+        numbers = self.numbers_as_numpy()
+
+        if not isinstance(self.marked, array.array):
+            raise ValueError(
+                f'marks of {self.rows}x{self.columns} boards do not fit a 64-bit mask '
+                'and have no numpy view'
+            )
+
+        return numbers, numpy.frombuffer(self.marked, dtype=numpy.uint64)
+
+
+class ArrayBingoBoard:
+    """
+    BingoBoard interface over one board of a BingoBoardStore
+    """
+    def __init__(self, store: BingoBoardStore, board_idx: int):
+        self._store = store
+        self._board_idx = board_idx
+
+    @property
+    def store(self) -> BingoBoardStore:
+        return self._store
+
+    @property
+    def board_idx(self) -> int:
+        return self._board_idx
+
+    def print(self):
+        for row in self.numbers():
+            print(row)
+
+    def numbers(self) -> typing.List[typing.List[int]]:
+        board_numbers = self._store.board_numbers(self._board_idx)
+        columns = self._store.columns
+
+        return [
+            list(board_numbers[row_start: row_start + columns])
+            for row_start in range(0, len(board_numbers), columns)
+        ]
+
+    def mark_cell(self, row: int, column: int):
+        self._store.marked[self._board_idx] |= 1 << (row * self._store.columns + column)
+
+    def mark_a_number(self, number: int):
+        board_numbers = self._store.board_numbers(self._board_idx)
+
+        if number not in board_numbers:
+            return
+
+        row, column = divmod(board_numbers.index(number), self._store.columns)
+        self.mark_cell(row, column)
+
+    def is_won(self) -> bool:
+        return self._store.is_won(self._board_idx)
+
+    def _numbers_by_mark(self, marked: bool) -> typing.List[int]:
+        marks = self._store.marked[self._board_idx]
+
+        return [
+            number
+            for cell_idx, number in enumerate(self._store.board_numbers(self._board_idx))
+            if bool(marks >> cell_idx & 1) == marked
+        ]
+
+    def get_marked_numbers(self) -> typing.List[int]:
+        return self._numbers_by_mark(True)
+
+    def get_unmarked_numbers(self) -> typing.List[int]:
+        return self._numbers_by_mark(False)
+
+
+class BingoIndex:
+    """
+    Index from a number to the cells holding it, across all boards.
+
+    A draw only touches the boards that contain the number, and boards are
+    returned in their original order.
+    """
+    def __init__(self, boards: typing.List[BingoBoard]):
+        self._cells = collections.defaultdict(list)
+
+        for board in boards:
+            indexed_numbers = set()
+
+            for row, board_row in enumerate(board.numbers()):
+                for column, number in enumerate(board_row):
+                    # like mark_a_number, only the first matching cell is marked
+                    if number in indexed_numbers:
+                        continue
+
+                    indexed_numbers.add(number)
+                    self._cells[number].append((board, row, column))
+
+    def mark_a_number(self, number: int) -> typing.List[BingoBoard]:
+        """
+        Mark the number on every board still in play, return the boards that
+        have just won
+        """
+        winning_boards = []
+
+        for board, row, column in self._cells.get(number, []):
+            if board.is_won():
+                continue
+
+            board.mark_cell(row, column)
+
+            if board.is_won():
+                winning_boards.append(board)
+
+        return winning_boards
+
+
+def find_winning_score(numbers, boards):
+    index = BingoIndex(boards)
 
     winning_boards = []
     last_number = 0
 
     for number in numbers:
         last_number = number
-        for board in boards:
-            board.mark_a_number(number)
-
-            if not board.is_won():
-                continue
-
-            winning_boards.append(board)
+        winning_boards = index.mark_a_number(number)
 
         if winning_boards:
             break
@@ -122,30 +348,30 @@ def play_bingo(input_file):
     )
 
 
-def play_bingo_to_lose(input_file):
-    numbers, boards = _read_data(input_file)
+def play_bingo(input_file, compact=False):
+    numbers, boards = _read_data(input_file, compact)
+
+    return find_winning_score(numbers, boards)
+
+
+def find_losing_score(numbers, boards):
+    index = BingoIndex(boards)
+    boards_in_play = len(boards)
 
     last_board = None
     last_number = 0
 
     for number in numbers:
         last_number = number
-        boards_to_play = []
+        winning_boards = index.mark_a_number(number)
 
-        for board in boards:
-            board.mark_a_number(number)
-
-            if not board.is_won():
-                boards_to_play.append(board)
-                continue
-
-            last_board = board
+        if winning_boards:
+            last_board = winning_boards[-1]
+            boards_in_play -= len(winning_boards)
 
-        if not boards_to_play:
+        if not boards_in_play:
             break
 
-        boards = boards_to_play
-
     losing_board = last_board
     losing_board.print()
 
@@ -156,13 +382,241 @@ def play_bingo_to_lose(input_file):
     )
 
 
+def play_bingo_to_lose(input_file, compact=False):
+    numbers, boards = _read_data(input_file, compact)
+
+    return find_losing_score(numbers, boards)
+
+
+@dataclasses.dataclass
+class BoardResult:
+    board: BingoBoard
+    win_turn: int
+    score: int
+
+
+def score_boards(
+    numbers: typing.List[int],
+    boards: typing.Iterable[BingoBoard],
+) -> typing.Iterator[BoardResult]:
+    """
+    Work out when every board wins without replaying the draws.
+
+    A line is complete on the turn its last number is drawn, so a board wins
+    on the earliest turn over its rows and columns of the latest turn in
+    that line. Boards are scored one at a time, in their original order;
+    boards that never win are left out.
+    """
+    draw_turns = {}
+
+    for turn, number in enumerate(numbers):
+        draw_turns.setdefault(number, turn)
+
+    for board in boards:
+        board_numbers = board.numbers()
+        seen_numbers = set()
+        cell_turns = []
+
+        for board_row in board_numbers:
+            row_turns = []
+
+            for number in board_row:
+                # like mark_a_number, only the first matching cell is ever marked
+                if number in seen_numbers:
+                    row_turns.append(math.inf)
+                    continue
+
+                seen_numbers.add(number)
+                row_turns.append(draw_turns.get(number, math.inf))
+
+            cell_turns.append(row_turns)
+
+        win_turn = min(itertools.chain(
+            (max(row_turns) for row_turns in cell_turns),
+            (max(column_turns) for column_turns in zip(*cell_turns)),
+        ))
+
+        if win_turn == math.inf:
+            continue
+
+        unmarked_sum = sum(
+            number
+            for board_row, row_turns in zip(board_numbers, cell_turns)
+            for number, cell_turn in zip(board_row, row_turns)
+            if cell_turn > win_turn
+        )
+
+        yield BoardResult(
+            board=board,
+            win_turn=win_turn,
+            score=unmarked_sum * numbers[win_turn],
+        )
+
+
+def _shared_store(boards: typing.Sequence[BingoBoard]) -> typing.Optional[BingoBoardStore]:
+    """
+    Return the store all boards are kept in, if they come from a single one
+    """
+    stores = {id(board.store): board.store for board in boards if isinstance(board, ArrayBingoBoard)}
+
+    if len(stores) != 1 or not all(isinstance(board, ArrayBingoBoard) for board in boards):
+        return None
+
+    store, = stores.values()
+
+    return store
+
+
+def _boards_as_numpy(boards: typing.Sequence[BingoBoard]) -> 'numpy.ndarray':
+    store = _shared_store(boards)
+
+    if store is None:
+        return numpy.array([board.numbers() for board in boards], dtype=numpy.int64)
+
+    numbers = store.numbers_as_numpy()
+
+    if len(boards) == len(store) and all(board.board_idx == idx for idx, board in enumerate(boards)):
+        return numbers
+
+    return numbers[[board.board_idx for board in boards]]
+
+
+def score_boards_numpy(
+    numbers: typing.List[int],
+    boards: typing.Sequence[BingoBoard],
+) -> typing.List[BoardResult]:
+    """
+    score_boards over all boards at once, as (board, row, column) array ops
+    """
+    if numpy is None:
+        raise RuntimeError('vectorized scoring requires numpy to be installed')
+
+    if not boards:
+        return []
+
+    board_numbers = _boards_as_numpy(boards)
+    boards_count, rows, columns = board_numbers.shape
+
+    # turn each number is first drawn on, len(numbers) for numbers never drawn
+    never = len(numbers)
+    drawn, first_turns = numpy.unique(numpy.array(numbers, dtype=numpy.int64), return_index=True)
+
+    if len(drawn):
+        positions = numpy.searchsorted(drawn, board_numbers).clip(max=len(drawn) - 1)
+        cell_turns = numpy.where(drawn[positions] == board_numbers, first_turns[positions], never)
+    else:
+        cell_turns = numpy.full(board_numbers.shape, never)
+
+    # like mark_a_number, only the first matching cell of a board is ever marked
+    flat_numbers = board_numbers.reshape(boards_count, -1)
+    order = numpy.argsort(flat_numbers, axis=1, kind='stable')
+    sorted_numbers = numpy.take_along_axis(flat_numbers, order, axis=1)
+    repeated = numpy.zeros(flat_numbers.shape, dtype=bool)
+    repeated[:, 1:] = sorted_numbers[:, 1:] == sorted_numbers[:, :-1]
+
+    flat_turns = cell_turns.reshape(boards_count, -1)
+    numpy.put_along_axis(
+        flat_turns,
+        order,
+        numpy.where(repeated, never, numpy.take_along_axis(flat_turns, order, axis=1)),
+        axis=1,
+    )
+
+    win_turns = numpy.minimum(
+        cell_turns.max(axis=2).min(axis=1),
+        cell_turns.max(axis=1).min(axis=1),
+    )
+    unmarked_sums = numpy.where(
+        cell_turns > win_turns[:, None, None],
+        board_numbers,
+        0,
+    ).sum(axis=(1, 2))
+
+    return [
+        BoardResult(
+            board=board,
+            win_turn=int(win_turn),
+            score=int(unmarked_sum) * numbers[win_turn],
+        )
+        for board, win_turn, unmarked_sum in zip(boards, win_turns, unmarked_sums)
+        if win_turn != never
+    ]
+
+
+def rank_boards(
+    numbers: typing.List[int],
+    boards: typing.Iterable[BingoBoard],
+) -> typing.List[BoardResult]:
+    """
+    Order boards by win turn, then by their original order
+    """
+    results = None
+
+    if numpy is not None:
+        boards = list(boards)
+
+        # the vectorized pass needs every board to have the same shape,
+        # which boards of one store always do
+        if (
+            _shared_store(boards) is not None
+            or
+            len({tuple(map(len, board.numbers())) for board in boards}) <= 1
+        ):
+            results = score_boards_numpy(numbers, boards)
+
+    if results is None:
+        results = score_boards(numbers, boards)
+
+    # sort is stable, so boards winning on the same turn keep their order
+    return sorted(results, key=lambda result: result.win_turn)
+
+
+def play_bingo_ranking(input_file, compact=False) -> typing.List[BoardResult]:
+    numbers, boards = _stream_data(input_file, compact)
+
+    return rank_boards(numbers, boards)
+
+
+def run_ranking(input_file, compact=False):
+    numbers, boards = _stream_data(input_file, compact)
+
+    if compact and numpy is not None:
+        # compact boards all end up in one store anyway, score them as arrays
+        results = score_boards_numpy(numbers, list(boards))
+    else:
+        # boards are scored as they are parsed, only the two extremes are kept
+        results = score_boards(numbers, boards)
+
+    first_result = None
+    last_result = None
+
+    for result in results:
+        if first_result is None or result.win_turn < first_result.win_turn:
+            first_result = result
+
+        if last_result is None or result.win_turn >= last_result.win_turn:
+            last_result = result
+
+    print('looking for winning board')
+    first_result.board.print()
+    print(first_result.score)
+
+    print('looking for losing board')
+    last_result.board.print()
+    print(last_result.score)
+
+
 if __name__ == '__main__':
     args = parse_args()
 
+    if args.ranking:
+        run_ranking(args.input, args.compact)
+        raise SystemExit
+
     print('looking for winning board')
-    bingo_score = play_bingo(args.input)
+    bingo_score = play_bingo(args.input, args.compact)
     print(bingo_score)
 
     print('looking for losing board')
-    bingo_score = play_bingo_to_lose(args.input)
+    bingo_score = play_bingo_to_lose(args.input, args.compact)
     print(bingo_score)
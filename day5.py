@@ -1,9 +1,23 @@
 import argparse
+import array
+import bisect
 import collections
+import concurrent.futures
 import dataclasses
+import itertools
+import math
+import mmap
+import multiprocessing.shared_memory
 import re
 import typing
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
+
 
 @dataclasses.dataclass
 class Vent:
@@ -18,6 +32,11 @@ def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--dense', action='store_true')
+    parser.add_argument('--analytic', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--at-least', type=int, metavar='VENTS', default=None)
+    parser.add_argument('--region', type=int, nargs=4, metavar=('X_FROM', 'Y_FROM', 'X_TO', 'Y_TO'), default=None)
 
     return parser.parse_args()
 
@@ -29,19 +48,66 @@ def abs_range(start, end):
         return range(start, end + 1)
 
 
-def _read_data(input_file) -> typing.Iterator[VentLine]:
-    def parse_vent(point_raw: str) -> Vent:
-        coords = re.fullmatch(
-            r'(\d+),(\d+)',
-            point_raw,
+def _parse_vent(point_raw: str) -> Vent:
+    coords = re.fullmatch(
+        r'(\d+),(\d+)',
+        point_raw,
+    )
+
+    if coords is None:
+        raise ValueError
+
+    x, y = coords.groups()
+    return Vent(int(x), int(y))
+
+
+@dataclasses.dataclass
+class VentSegment:
+    start: Vent
+    end: Vent
+
+    def step(self) -> typing.Optional[typing.Tuple[int, int]]:
+        """
+        Unit (x, y) step from start to end, None for lines that are neither
+        horizontal, vertical nor diagonal
+        """
+        delta_x = self.end.x - self.start.x
+        delta_y = self.end.y - self.start.y
+
+        if delta_x != 0 and delta_y != 0 and abs(delta_x) != abs(delta_y):
+            return None
+
+        return (
+            (delta_x > 0) - (delta_x < 0),
+            (delta_y > 0) - (delta_y < 0),
         )
 
-        if coords is None:
-            raise ValueError
+    def __len__(self) -> int:
+        """
+        Number of points on the segment
+        """
+        if self.step() is None:
+            return 0
+
+        return max(
+            abs(self.end.x - self.start.x),
+            abs(self.end.y - self.start.y),
+        ) + 1
 
-        x, y = coords.groups()
-        return Vent(int(x), int(y))
 
+def _read_segments(input_file) -> typing.Iterator[VentSegment]:
+    lines = input_reader.read_lines(input_file)
+
+    for line in lines:
+        line_from, line_to = line.split(' -> ')
+
+        yield VentSegment(
+            _parse_vent(line_from),
+            _parse_vent(line_to),
+        )
+
+
+def _read_data(input_file) -> typing.Iterator[VentLine]:
     def parse_vent_line(start: Vent, end: Vent) -> VentLine:
         # Vertical line
         if start.x == end.x:
@@ -70,19 +136,678 @@ def _read_data(input_file) -> typing.Iterator[VentLine]:
         # Some other line
         return []
 
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    for segment in _read_segments(input_file):
+        yield parse_vent_line(segment.start, segment.end)
 
-    for line in lines:
-        line_from, line_to = line.split(' -> ')
 
-        yield parse_vent_line(
-            parse_vent(line_from),
-            parse_vent(line_to),
+# Dense grids bigger than this, or much bigger than the points they hold,
+# are left to the sparse dictionary counter
+DENSE_GRID_MAX_CELLS = 10 ** 8
+DENSE_GRID_MAX_SPARSITY = 16
+
+
+class VentGrid:
+    """
+    Overlap counts on a dense grid covering the bounds of the segments.
+
+    Every supported segment is a run of cells with a fixed stride in the
+    flattened grid, so it is rasterized with one strided slice update.
+    """
+    def __init__(self, min_x: int, min_y: int, width: int, height: int, cells=None):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.width = width
+        self.height = height
+
+        if cells is not None:
+            self.cells = cells
+        elif numpy is not None:
+            self.cells = numpy.zeros(width * height, dtype=numpy.int32)
+        else:
+            self.cells = array.array('i', bytes(4 * width * height))
+
+    @staticmethod
+    def _bounds(segments: typing.Sequence[VentSegment]) -> typing.Tuple[int, int, int, int]:
+        """
+        Return (min x, min y, width, height) of the supported segments
+        """
+        segments = [segment for segment in segments if segment.step() is not None]
+
+        if not segments:
+            return 0, 0, 0, 0
+
+        xs = [x for segment in segments for x in (segment.start.x, segment.end.x)]
+        ys = [y for segment in segments for y in (segment.start.y, segment.end.y)]
+
+        return min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1
+
+    @classmethod
+    def from_segments(cls, segments: typing.Sequence[VentSegment]) -> 'VentGrid':
+        grid = cls(*cls._bounds(segments))
+
+        for segment in segments:
+            grid.add_segment(segment)
+
+        return grid
+
+    @staticmethod
+    def extent_fits(width: int, height: int, points: int) -> bool:
+        grid_size = width * height
+
+        return (
+            grid_size <= DENSE_GRID_MAX_CELLS
+            and
+            grid_size <= points * DENSE_GRID_MAX_SPARSITY
+        )
+
+    @classmethod
+    def fits(cls, segments: typing.Sequence[VentSegment]) -> bool:
+        _, _, width, height = cls._bounds(segments)
+
+        return cls.extent_fits(width, height, sum(len(segment) for segment in segments))
+
+    def _cell_idx(self, vent: Vent) -> int:
+        return (vent.y - self.min_y) * self.width + (vent.x - self.min_x)
+
+    def add_segment(self, segment: VentSegment):
+        step = segment.step()
+
+        if step is None:
+            return
+
+        step_x, step_y = step
+        stride = step_y * self.width + step_x
+        first_idx = self._cell_idx(segment.start)
+        last_idx = self._cell_idx(segment.end)
+
+        # walk every segment forwards through the flattened grid
+        if stride < 0:
+            stride = -stride
+            first_idx, last_idx = last_idx, first_idx
+
+        cells_slice = slice(first_idx, last_idx + 1, stride or 1)
+
+        if numpy is not None:
+            self.cells[cells_slice] += 1
+        else:
+            for cell_idx in range(*cells_slice.indices(len(self.cells))):
+                self.cells[cell_idx] += 1
+
+    def count_overlaps(self, min_vents: int = 2) -> int:
+        if numpy is not None:
+            return int(numpy.count_nonzero(self.cells >= min_vents))
+
+        return sum(1 for vents_count in self.cells if vents_count >= min_vents)
+
+
+class VentOverlapIndex:
+    """
+    O(1) threshold and rectangle queries over a VentGrid, from a histogram of
+    vent counts and a 2-D prefix sum of the points with at least min_vents vents
+    """
+    def __init__(self, grid: VentGrid, min_vents: int = 2):
+        self.grid = grid
+        self.min_vents = min_vents
+
+        if numpy is not None:
+            histogram = numpy.bincount(grid.cells) if len(grid.cells) else numpy.zeros(1, dtype=numpy.int64)
+            histogram = [int(points) for points in histogram]
+        else:
+            vents_counts = collections.Counter(grid.cells)
+            histogram = [vents_counts[vents] for vents in range(max(vents_counts, default=0) + 1)]
+
+        # _at_least[k] is the number of points with at least k vents
+        self._at_least = list(itertools.accumulate(reversed(histogram)))[::-1] + [0]
+
+        # _prefix[y * (width + 1) + x] is the number of overlap points above and
+        # to the left of (x, y), with a zero row and column in front
+        prefix_width = grid.width + 1
+
+        if numpy is not None:
+            overlaps = (grid.cells >= min_vents).reshape(grid.height, grid.width)
+            prefix = numpy.zeros((grid.height + 1, prefix_width), dtype=numpy.int64)
+            prefix[1:, 1:] = overlaps.cumsum(axis=0).cumsum(axis=1)
+            self._prefix = prefix.reshape(-1)
+        else:
+            self._prefix = array.array('q', bytes(8 * prefix_width * (grid.height + 1)))
+
+            for y in range(grid.height):
+                row_sum = 0
+
+                for x in range(grid.width):
+                    row_sum += grid.cells[y * grid.width + x] >= min_vents
+                    self._prefix[(y + 1) * prefix_width + x + 1] = (
+                        self._prefix[y * prefix_width + x + 1] + row_sum
+                    )
+
+    def count_at_least(self, min_vents: int) -> int:
+        """
+        Number of points with at least min_vents vents, min_vents >= 1
+        """
+        min_vents = max(min_vents, 1)
+
+        if min_vents >= len(self._at_least):
+            return 0
+
+        return self._at_least[min_vents]
+
+    def count_in_region(self, x_from: int, y_from: int, x_to: int, y_to: int) -> int:
+        """
+        Number of points with at least min_vents vents inside the inclusive
+        rectangle between (x_from, y_from) and (x_to, y_to)
+        """
+        grid = self.grid
+
+        # clip the rectangle to the grid, in grid coordinates
+        column_from = max(min(x_from, x_to) - grid.min_x, 0)
+        column_to = min(max(x_from, x_to) - grid.min_x + 1, grid.width)
+        row_from = max(min(y_from, y_to) - grid.min_y, 0)
+        row_to = min(max(y_from, y_to) - grid.min_y + 1, grid.height)
+
+        if column_from >= column_to or row_from >= row_to:
+            return 0
+
+        prefix_width = grid.width + 1
+
+        return int(
+            self._prefix[row_to * prefix_width + column_to]
+            - self._prefix[row_from * prefix_width + column_to]
+            - self._prefix[row_to * prefix_width + column_from]
+            + self._prefix[row_from * prefix_width + column_from]
+        )
+
+
+# Line directions of the supported segments: horizontal, vertical and the
+# two diagonals. Points on one line share key = dy * x - dx * y.
+SEGMENT_DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+# (key, first position, last position) of a run of points along a line
+LineInterval = typing.Tuple[int, int, int]
+
+
+def _segment_direction(segment: VentSegment) -> typing.Tuple[int, int]:
+    step_x, step_y = segment.step()
+
+    # single points are treated as horizontal segments
+    if (step_x, step_y) == (0, 0):
+        return 1, 0
+
+    if step_x < 0 or (step_x == 0 and step_y < 0):
+        return -step_x, -step_y
+
+    return step_x, step_y
+
+
+def _line_key(direction: typing.Tuple[int, int], vent: Vent) -> int:
+    direction_x, direction_y = direction
+    return direction_y * vent.x - direction_x * vent.y
+
+
+def _line_position(direction: typing.Tuple[int, int], vent: Vent) -> int:
+    return vent.x if direction[0] else vent.y
+
+
+def _line_point(direction: typing.Tuple[int, int], key: int, position: int) -> Vent:
+    direction_x, direction_y = direction
+
+    if direction_x:
+        return Vent(position, direction_y * position - key)
+
+    return Vent(key, position)
+
+
+def _merge_line_intervals(
+    intervals: typing.List[typing.Tuple[int, int]],
+) -> typing.Tuple[typing.List[typing.Tuple[int, int]], typing.List[typing.Tuple[int, int]]]:
+    """
+    Merge the intervals of one line into the runs covered at least once and
+    the runs covered at least twice
+    """
+    events = sorted(
+        [(first, 1) for first, _ in intervals]
+        + [(last + 1, -1) for _, last in intervals]
+    )
+
+    covered, overlapped = [], []
+    covered_start = overlapped_start = None
+    coverage = 0
+
+    for position, change in events:
+        coverage += change
+
+        if coverage >= 1 and covered_start is None:
+            covered_start = position
+        elif coverage == 0 and covered_start is not None:
+            if covered_start < position:
+                covered.append((covered_start, position - 1))
+            covered_start = None
+
+        if coverage >= 2 and overlapped_start is None:
+            overlapped_start = position
+        elif coverage < 2 and overlapped_start is not None:
+            if overlapped_start < position:
+                overlapped.append((overlapped_start, position - 1))
+            overlapped_start = None
+
+    return covered, overlapped
+
+
+def _line_crossings(
+    direction_a: typing.Tuple[int, int],
+    lines_a: typing.List[LineInterval],
+    direction_b: typing.Tuple[int, int],
+    lines_b: typing.List[LineInterval],
+) -> typing.Iterator[Vent]:
+    """
+    Sweep for the lattice points where runs of two directions cross
+    """
+    direction_a_x, direction_a_y = direction_a
+    direction_b_x, direction_b_y = direction_b
+    determinant = direction_a_x * direction_b_y - direction_a_y * direction_b_x
+
+    def key_span(direction, other_direction, line):
+        key, first, last = line
+        keys = [
+            _line_key(other_direction, _line_point(direction, key, first)),
+            _line_key(other_direction, _line_point(direction, key, last)),
+        ]
+        return min(keys), max(keys)
+
+    # sweep along key a: runs of b open and close, runs of a query
+    events = []
+
+    for line in lines_b:
+        key_a_low, key_a_high = key_span(direction_b, direction_a, line)
+        events.append((key_a_low, 0, line[0]))
+        events.append((key_a_high, 2, line[0]))
+
+    for line in lines_a:
+        key_b_low, key_b_high = key_span(direction_a, direction_b, line)
+        events.append((line[0], 1, (key_b_low, key_b_high)))
+
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    active_keys = []
+
+    for key_a, event_type, payload in events:
+        if event_type == 0:
+            bisect.insort(active_keys, payload)
+            continue
+
+        if event_type == 2:
+            del active_keys[bisect.bisect_left(active_keys, payload)]
+            continue
+
+        key_b_low, key_b_high = payload
+
+        for key_b in active_keys[
+            bisect.bisect_left(active_keys, key_b_low):
+            bisect.bisect_right(active_keys, key_b_high)
+        ]:
+            x_scaled = direction_a_x * key_b - direction_b_x * key_a
+            y_scaled = direction_a_y * key_b - direction_b_y * key_a
+
+            # diagonals of different parity cross between lattice points
+            if x_scaled % determinant or y_scaled % determinant:
+                continue
+
+            yield Vent(x_scaled // determinant, y_scaled // determinant)
+
+
+def count_vent_overlaps_analytic(segments: typing.Iterable[VentSegment]) -> int:
+    """
+    Count points covered by at least two segments from merged collinear runs
+    and the crossings between directions, without visiting every point
+    """
+    line_intervals = {direction: collections.defaultdict(list) for direction in SEGMENT_DIRECTIONS}
+
+    for segment in segments:
+        if segment.step() is None:
+            continue
+
+        direction = _segment_direction(segment)
+        positions = sorted([
+            _line_position(direction, segment.start),
+            _line_position(direction, segment.end),
+        ])
+
+        line_intervals[direction][_line_key(direction, segment.start)].append(tuple(positions))
+
+    covered_lines = {}
+    overlapped_lines = {}
+    overlaps = 0
+
+    for direction, lines in line_intervals.items():
+        covered_lines[direction] = []
+        overlapped_lines[direction] = {}
+
+        for key, intervals in lines.items():
+            covered, overlapped = _merge_line_intervals(intervals)
+
+            covered_lines[direction] += [(key, first, last) for first, last in covered]
+            overlapped_lines[direction][key] = overlapped
+            overlaps += sum(last - first + 1 for first, last in overlapped)
+
+    def is_overlapped(direction, vent):
+        overlapped = overlapped_lines[direction].get(_line_key(direction, vent), [])
+        position = _line_position(direction, vent)
+        run_idx = bisect.bisect_right(overlapped, (position, math.inf)) - 1
+
+        return run_idx >= 0 and overlapped[run_idx][1] >= position
+
+    crossings = set()
+
+    for direction_a, direction_b in itertools.combinations(SEGMENT_DIRECTIONS, 2):
+        crossings.update(
+            (vent.x, vent.y)
+            for vent in _line_crossings(
+                direction_a, covered_lines[direction_a],
+                direction_b, covered_lines[direction_b],
+            )
+        )
+
+    for x, y in crossings:
+        overlaps += 1 - sum(
+            is_overlapped(direction, Vent(x, y))
+            for direction in SEGMENT_DIRECTIONS
+        )
+
+    return overlaps
+
+
+def _cells_view(buffer: memoryview, cells_count: int) -> typing.Union['numpy.ndarray', memoryview]:
+    """
+    View the start of a raw buffer as the flat int32 cells of a VentGrid
+    """
+    if numpy is not None:
+        return numpy.ndarray(cells_count, dtype=numpy.int32, buffer=buffer)
+
+    return buffer[:4 * cells_count].cast('i')
+
+
+SEGMENT_LINE = re.compile(rb'^(\d+),(\d+) -> (\d+),(\d+)\r?$', re.MULTILINE)
+
+
+def _parse_segment_range(input_file: str, range_start: int, range_end: int) -> array.array:
+    """
+    Flat (x1, y1, x2, y2) coordinates of the supported segments in a byte range
+    """
+    with open(input_file, 'rb') as _input:
+        with mmap.mmap(_input.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunk = data[range_start:range_end]
+
+    matches = SEGMENT_LINE.findall(chunk)
+
+    if len(matches) != chunk.count(b'\n') + (not chunk.endswith(b'\n')):
+        raise ValueError(f'malformed vent line between bytes {range_start} and {range_end}')
+
+    coords = array.array('q')
+
+    for x1, y1, x2, y2 in matches:
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+
+        if x1 == x2 or y1 == y2 or abs(x1 - x2) == abs(y1 - y2):
+            coords.extend((x1, y1, x2, y2))
+
+    return coords
+
+
+def _coords_extent(coords: typing.Sequence[int]) -> typing.Tuple[typing.Tuple[int, int, int, int], int]:
+    """
+    Return the (min x, min y, width, height) bounds and the number of points
+    of flat segment coordinates
+    """
+    if not coords:
+        return (0, 0, 0, 0), 0
+
+    if numpy is not None:
+        segments = numpy.frombuffer(coords, dtype=numpy.int64).reshape(-1, 4)
+        xs, ys = segments[:, 0::2], segments[:, 1::2]
+        min_x, max_x, min_y, max_y = int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max())
+        points = len(segments) + int(numpy.maximum(
+            numpy.abs(segments[:, 2] - segments[:, 0]),
+            numpy.abs(segments[:, 3] - segments[:, 1]),
+        ).sum())
+    else:
+        xs, ys = coords[0::2], coords[1::2]
+        min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+        points = sum(
+            max(abs(coords[idx + 2] - coords[idx]), abs(coords[idx + 3] - coords[idx + 1])) + 1
+            for idx in range(0, len(coords), 4)
         )
 
+    return (min_x, min_y, max_x - min_x + 1, max_y - min_y + 1), points
+
+
+def _clip_segment_rows(x1: int, y1: int, x2: int, y2: int, y_from: int, y_to: int) -> VentSegment:
+    """
+    Part of a supported segment between rows y_from and y_to, inclusive
+    """
+    step_x = (x2 > x1) - (x2 < x1)
+    step_y = (y2 > y1) - (y2 < y1)
+
+    if step_y == 0:
+        return VentSegment(Vent(x1, y1), Vent(x2, y2))
+
+    if step_y > 0:
+        first_step, last_step = max(0, y_from - y1), min(y2 - y1, y_to - y1)
+    else:
+        first_step, last_step = max(0, y1 - y_to), min(y1 - y2, y1 - y_from)
+
+    return VentSegment(
+        Vent(x1 + step_x * first_step, y1 + step_y * first_step),
+        Vent(x1 + step_x * last_step, y1 + step_y * last_step),
+    )
+
+
+def _band_vent_counts(segments: 'numpy.ndarray', band: VentGrid) -> 'numpy.ndarray':
+    """
+    Vents per cell of a band from (x1, y1, x2, y2) rows, as one bincount over
+    the flattened cells of every segment clipped to the band rows
+    """
+    y_from, y_to = band.min_y, band.min_y + band.height - 1
+    segments = segments[
+        (numpy.minimum(segments[:, 1], segments[:, 3]) <= y_to)
+        & (numpy.maximum(segments[:, 1], segments[:, 3]) >= y_from)
+    ]
+    x1, y1, x2, y2 = segments.T
+    step_x, step_y = numpy.sign(x2 - x1), numpy.sign(y2 - y1)
+
+    first_step = numpy.maximum(0, numpy.where(step_y > 0, y_from - y1, y1 - y_to) * (step_y != 0))
+    last_step = numpy.where(
+        step_y == 0,
+        numpy.abs(x2 - x1),
+        numpy.minimum(numpy.abs(y2 - y1), numpy.where(step_y > 0, y_to - y1, y1 - y_from)),
+    )
+
+    first_cells = (y1 + step_y * first_step - y_from) * band.width + (x1 + step_x * first_step - band.min_x)
+    strides = step_y * band.width + step_x
+    points = last_step - first_step + 1
+
+    # step k along segment i is cell first_cells[i] + k * strides[i]
+    steps = numpy.arange(points.sum()) - numpy.repeat(numpy.cumsum(points) - points, points)
+    cells = numpy.repeat(first_cells, points) + numpy.repeat(strides, points) * steps
+
+    return numpy.bincount(cells, minlength=band.width * band.height).astype(numpy.int32)
+
+
+def _rasterize_band(
+    coords_name: str,
+    coords_count: int,
+    grid_name: str,
+    bounds: typing.Tuple[int, int, int, int],
+    row_from: int,
+    row_to: int,
+) -> int:
+    """
+    Rasterize the parts of all segments within rows [row_from, row_to) of the
+    shared grid, return the points of the band with at least two vents
+    """
+    coords_memory = multiprocessing.shared_memory.SharedMemory(coords_name)
+    grid_memory = multiprocessing.shared_memory.SharedMemory(grid_name)
+    min_x, min_y, width, height = bounds
+    y_from, y_to = min_y + row_from, min_y + row_to - 1
+
+    if numpy is not None:
+        coords = numpy.ndarray(coords_count, dtype=numpy.int64, buffer=coords_memory.buf)
+        cells = numpy.ndarray(width * height, dtype=numpy.int32, buffer=grid_memory.buf)
+    else:
+        coords = coords_memory.buf[:8 * coords_count].cast('q')
+        cells = grid_memory.buf[:4 * width * height].cast('i')
+
+    band_cells = cells[row_from * width: row_to * width]
+    band = None
+
+    try:
+        band = VentGrid(min_x, y_from, width, row_to - row_from, cells=band_cells)
+
+        if numpy is not None:
+            band_cells += _band_vent_counts(coords.reshape(-1, 4), band)
+        else:
+            for idx in range(0, coords_count, 4):
+                x1, y1, x2, y2 = coords[idx: idx + 4].tolist()
+
+                if min(y1, y2) <= y_to and max(y1, y2) >= y_from:
+                    band.add_segment(_clip_segment_rows(x1, y1, x2, y2, y_from, y_to))
+
+        return band.count_overlaps()
+    finally:
+        # views have to go before the shared memory can be closed
+        for view in (band_cells, cells, coords):
+            if isinstance(view, memoryview):
+                view.release()
+
+        del band, band_cells, cells, coords
+        coords_memory.close()
+        grid_memory.close()
+
+
+def rasterize_segments_parallel(
+    input_file: str,
+    workers: int,
+    chunk_size: int = 16 * 1024 * 1024,
+    bands_per_worker: int = 4,
+) -> typing.Optional[typing.Tuple[VentGrid, int]]:
+    """
+    Parse and rasterize segments on workers, one band of grid rows per task.
+    Returns the grid and its overlap count, None if it fails VentGrid.extent_fits.
+    """
+    chunks = input_reader.chunk_ranges(input_file, chunk_size)
+    coords = array.array('q')
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_coords in executor.map(
+            _parse_segment_range,
+            itertools.repeat(input_file),
+            *zip(*chunks),
+        ) if chunks else []:
+            coords.extend(chunk_coords)
+
+    bounds, points = _coords_extent(coords)
+    _, _, width, height = bounds
+
+    if not VentGrid.extent_fits(width, height, points):
+        return None
+
+    coords_count = len(coords)
+    coords_memory = multiprocessing.shared_memory.SharedMemory(create=True, size=max(8, 8 * coords_count))
+    grid_memory = multiprocessing.shared_memory.SharedMemory(create=True, size=max(4, 4 * width * height))
+
+    try:
+        coords_memory.buf[:8 * coords_count] = coords.tobytes()
+        del coords
+
+        band_rows = max(1, -(-height // (workers * bands_per_worker)))
+        row_froms = range(0, height, band_rows)
+
+        # a new pool, so that its workers share the tracker of the shared memory
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            overlaps = sum(executor.map(
+                _rasterize_band,
+                itertools.repeat(coords_memory.name),
+                itertools.repeat(coords_count),
+                itertools.repeat(grid_memory.name),
+                itertools.repeat(bounds),
+                row_froms,
+                [min(row_from + band_rows, height) for row_from in row_froms],
+            ))
+
+        grid_cells = _cells_view(grid_memory.buf, width * height)
+
+        if numpy is not None:
+            cells = grid_cells.copy()
+        else:
+            cells = array.array('i', grid_cells)
+            grid_cells.release()
+
+        del grid_cells
+    finally:
+        for shared_memory in (coords_memory, grid_memory):
+            shared_memory.close()
+            shared_memory.unlink()
+
+    return VentGrid(*bounds, cells=cells), overlaps
+
+
+def build_vent_grid(input_file: str, workers: typing.Optional[int] = None) -> VentGrid:
+    """
+    Accumulate the dense overlap grid, on worker processes if workers is set
+    """
+    if workers:
+        rasterized = rasterize_segments_parallel(input_file, workers)
+        grid = rasterized[0] if rasterized is not None else None
+    else:
+        segments = list(_read_segments(input_file))
+        grid = VentGrid.from_segments(segments) if VentGrid.fits(segments) else None
+
+    if grid is None:
+        raise ValueError('segments are too sparse or too far apart for a dense grid')
+
+    return grid
+
+
+def build_overlap_index(
+    input_file: str,
+    min_vents: int = 2,
+    workers: typing.Optional[int] = None,
+) -> VentOverlapIndex:
+    return VentOverlapIndex(build_vent_grid(input_file, workers), min_vents)
+
+
+def find_thermal_vents(
+    input_file: str,
+    dense: bool = False,
+    analytic: bool = False,
+    workers: typing.Optional[int] = None,
+) -> typing.Optional[VentGrid]:
+    """
+    Print the number of points with at least two vents. The dense and
+    parallel paths return their accumulated grid, for VentOverlapIndex.
+    """
+    if workers:
+        rasterized = rasterize_segments_parallel(input_file, workers)
+
+        # surveys too wide for a dense grid are counted analytically
+        if rasterized is None:
+            print(count_vent_overlaps_analytic(_read_segments(input_file)))
+            return None
+
+        grid, overlaps = rasterized
+        print(overlaps)
+        return grid
+
+    if analytic:
+        print(count_vent_overlaps_analytic(_read_segments(input_file)))
+        return None
+
+    if dense:
+        segments = list(_read_segments(input_file))
+
+        if VentGrid.fits(segments):
+            grid = VentGrid.from_segments(segments)
+            print(grid.count_overlaps())
+            return grid
 
-def find_thermal_vents(input_file: str) -> None:
     vent_lines = _read_data(input_file)
 
     vent_locations = collections.defaultdict(lambda: 0)
@@ -99,8 +824,21 @@ def find_thermal_vents(input_file: str) -> None:
 
     print(len(vent_line_overlaps))
 
+    return None
+
 
 if __name__ == '__main__':
     args = parse_args()
 
-    find_thermal_vents(args.input)
+    if args.at_least is not None or args.region is not None:
+        index = build_overlap_index(args.input, workers=args.workers)
+
+        if args.at_least is not None:
+            print(index.count_at_least(args.at_least))
+
+        if args.region is not None:
+            print(index.count_in_region(*args.region))
+
+        raise SystemExit
+
+    find_thermal_vents(args.input, args.dense, args.analytic, args.workers)
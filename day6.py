@@ -1,23 +1,36 @@
 import argparse
 import copy
+import dataclasses
+import itertools
 import typing
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import input_reader
+
 
 FISH_SPAWN_RATE = 6
 FIRST_GENERATION_SPAWN_RATE = 8
 
+INT64_MAX = 2 ** 63 - 1
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--generations', type=int, default=18)
+    parser.add_argument('--matrix', action='store_true')
+    parser.add_argument('--modulus', type=int, default=None)
 
     return parser.parse_args()
 
 
 def _read_data(input_file) -> typing.List[int]:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     fish_ages = [0] * (FIRST_GENERATION_SPAWN_RATE + 1)
 
@@ -42,10 +55,264 @@ def emulate_generation(fish_ages: typing.List[int]) -> typing.List[int]:
     return next_generation_ages
 
 
-def run(input_file: str) -> None:
-    fish_ages = _read_data(input_file)
+Matrix = typing.List[typing.List[int]]
+
+
+def transition_matrix() -> Matrix:
+    """
+    One generation as a matrix over the age counts: next = matrix * current
+    """
+    ages = FIRST_GENERATION_SPAWN_RATE + 1
+    matrix = [[0] * ages for _ in range(ages)]
+
+    for age in range(1, ages):
+        matrix[age - 1][age] = 1
+
+    matrix[FIRST_GENERATION_SPAWN_RATE][0] += 1
+    matrix[FISH_SPAWN_RATE][0] += 1
+
+    return matrix
+
+
+def _matrix_multiply(a: Matrix, b: Matrix, modulus: typing.Optional[int] = None) -> Matrix:
+    b_columns = list(zip(*b))
+
+    product = [
+        [sum(x * y for x, y in zip(a_row, b_column)) for b_column in b_columns]
+        for a_row in a
+    ]
+
+    if modulus is not None:
+        product = [[value % modulus for value in row] for row in product]
+
+    return product
+
+
+def _matrix_power(matrix: Matrix, power: int, modulus: typing.Optional[int] = None) -> Matrix:
+    size = len(matrix)
+    result = [[int(row == column) for column in range(size)] for row in range(size)]
+
+    # exponentiation by squaring
+    while power:
+        if power & 1:
+            result = _matrix_multiply(result, matrix, modulus)
+
+        power >>= 1
+
+        if power:
+            matrix = _matrix_multiply(matrix, matrix, modulus)
+
+    return result
+
+
+def emulate_generations_batch(
+    populations: typing.List[typing.List[int]],
+    generations: int,
+    modulus: typing.Optional[int] = None,
+) -> typing.List[typing.List[int]]:
+    """
+    Advance many populations at once: the matrix power is computed once and
+    all populations are multiplied by it together.
+
+    The population grows exponentially, so exact counts have a number of
+    digits proportional to the generations; pass a modulus for horizons
+    where only the count modulo some number is useful.
+    """
+    if not populations:
+        return []
+
+    advance = _matrix_power(transition_matrix(), generations, modulus)
+
+    # populations are the columns of the right hand side
+    advanced = _matrix_multiply(
+        advance,
+        [list(ages) for ages in zip(*populations)],
+        modulus,
+    )
+
+    return [list(ages) for ages in zip(*advanced)]
+
+
+def emulate_generations(
+    fish_ages: typing.List[int],
+    generations: int,
+    modulus: typing.Optional[int] = None,
+) -> typing.List[int]:
+    """
+    Population after any number of generations in O(log generations) matrix
+    multiplications
+    """
+    next_generation_ages, = emulate_generations_batch([fish_ages], generations, modulus)
+
+    return next_generation_ages
+
+
+@dataclasses.dataclass(frozen=True)
+class SpawnParameters:
+    fish_spawn_rate: int = FISH_SPAWN_RATE
+    first_generation_spawn_rate: int = FIRST_GENERATION_SPAWN_RATE
+
+
+def _initial_ring(fish_ages: typing.List[int], parameters: SpawnParameters) -> typing.List[int]:
+    ring_size = parameters.first_generation_spawn_rate + 1
+
+    if parameters.fish_spawn_rate > parameters.first_generation_spawn_rate:
+        raise ValueError('fish spawn rate can not exceed the first generation spawn rate')
+
+    if any(fish_ages[ring_size:]):
+        raise ValueError('fish ages exceed the first generation spawn rate')
+
+    return (list(fish_ages) + [0] * ring_size)[:ring_size]
+
+
+def population_curve(
+    fish_ages: typing.List[int],
+    parameters: SpawnParameters,
+    generations: int,
+) -> typing.List[int]:
+    """
+    Total population after 0, 1, ..., generations generations.
 
-    generations = 18
+    Ages live in a ring buffer, so a generation only moves its start: the
+    spawning fish at the start become the newborns at the end of the ring,
+    and the same number of parents is added back at the spawn rate age.
+    """
+    ring = _initial_ring(fish_ages, parameters)
+    ring_size = len(ring)
+    ring_start = 0
+
+    population = sum(ring)
+    curve = [population]
+
+    for _ in range(generations):
+        spawning_generation = ring[ring_start]
+        ring_start = (ring_start + 1) % ring_size
+
+        ring[(ring_start + parameters.fish_spawn_rate) % ring_size] += spawning_generation
+
+        population += spawning_generation
+        curve.append(population)
+
+    return curve
+
+
+@dataclasses.dataclass
+class PopulationCurves:
+    """
+    One population curve per parameter set, up to the longest horizon
+    """
+    parameters: typing.List[SpawnParameters]
+    horizons: typing.List[int]
+    # (parameter set, generation) populations, a numpy array when available
+    populations: typing.Union['numpy.ndarray', typing.List[typing.List[int]]]
+
+    def curve(self, parameters: SpawnParameters, horizon: typing.Optional[int] = None):
+        """
+        Populations of one parameter set up to horizon, a view with numpy
+        """
+        populations = self.populations[self.parameters.index(parameters)]
+
+        if horizon is None:
+            return populations
+
+        return populations[:horizon + 1]
+
+
+def _simulate_batch_numpy(
+    rings: typing.List[typing.List[int]],
+    parameters_grid: typing.List[SpawnParameters],
+    generations: int,
+) -> 'numpy.ndarray':
+    ring_sizes = numpy.array([len(ring) for ring in rings])
+    spawn_rates = numpy.array([parameters.fish_spawn_rate for parameters in parameters_grid])
+    rows = numpy.arange(len(rings))
+
+    # rings are padded to the widest one, padding is never indexed
+    state = numpy.zeros((len(rings), ring_sizes.max()), dtype=numpy.int64)
+
+    for row, ring in enumerate(rings):
+        state[row, :len(ring)] = ring
+
+    populations = numpy.zeros((len(rings), generations + 1), dtype=numpy.int64)
+    populations[:, 0] = state.sum(axis=1)
+
+    for generation in range(generations):
+        ring_starts = generation % ring_sizes
+        spawning = state[rows, ring_starts]
+
+        # counts past int64 carry on as exact Python ints
+        if populations.dtype != object and (populations[:, generation] > INT64_MAX - spawning).any():
+            state = state.astype(object)
+            populations = populations.astype(object)
+            spawning = spawning.astype(object)
+
+        state[rows, (ring_starts + 1 + spawn_rates) % ring_sizes] += spawning
+        populations[:, generation + 1] = populations[:, generation] + spawning
+
+    return populations
+
+
+def _simulate_batch_python(
+    rings: typing.List[typing.List[int]],
+    parameters_grid: typing.List[SpawnParameters],
+    generations: int,
+) -> typing.List[typing.List[int]]:
+    populations = [[sum(ring)] for ring in rings]
+
+    for generation in range(generations):
+        for ring, parameters, curve in zip(rings, parameters_grid, populations):
+            ring_start = generation % len(ring)
+            spawning_generation = ring[ring_start]
+
+            ring[(ring_start + 1 + parameters.fish_spawn_rate) % len(ring)] += spawning_generation
+            curve.append(curve[-1] + spawning_generation)
+
+    return populations
+
+
+def simulate_batch(
+    fish_ages: typing.List[int],
+    parameters_grid: typing.Iterable[SpawnParameters],
+    horizons: typing.Iterable[int],
+) -> PopulationCurves:
+    """
+    Advance the rings of all parameter sets together, one generation at a
+    time, up to the longest horizon
+    """
+    parameters_grid = list(dict.fromkeys(parameters_grid))
+    horizons = sorted(set(horizons))
+    generations = horizons[-1] if horizons else 0
+
+    rings = [_initial_ring(fish_ages, parameters) for parameters in parameters_grid]
+
+    if numpy is not None and rings:
+        populations = _simulate_batch_numpy(rings, parameters_grid, generations)
+    else:
+        populations = _simulate_batch_python(rings, parameters_grid, generations)
+
+    return PopulationCurves(parameters_grid, horizons, populations)
+
+
+def simulate_grid(
+    fish_ages: typing.List[int],
+    fish_spawn_rates: typing.Iterable[int],
+    first_generation_spawn_rates: typing.Iterable[int],
+    horizons: typing.Iterable[int],
+) -> PopulationCurves:
+    parameters_grid = [
+        SpawnParameters(fish_spawn_rate, first_generation_spawn_rate)
+        for fish_spawn_rate, first_generation_spawn_rate in itertools.product(
+            fish_spawn_rates,
+            first_generation_spawn_rates,
+        )
+        if fish_spawn_rate <= first_generation_spawn_rate
+    ]
+
+    return simulate_batch(fish_ages, parameters_grid, horizons)
+
+
+def run(input_file: str, generations: int = 18) -> None:
+    fish_ages = _read_data(input_file)
 
     for generation in range(generations):
         print(f'generation - {generation}, fish population - {fish_ages}')
@@ -57,4 +324,13 @@ def run(input_file: str) -> None:
 if __name__ == '__main__':
     args = parse_args()
 
-    run(args.input)
+    if args.matrix:
+        fish_ages = emulate_generations(_read_data(args.input), args.generations, args.modulus)
+        fish_count = sum(fish_ages)
+
+        if args.modulus is not None:
+            fish_count %= args.modulus
+
+        print(f'final fish count - {fish_count}')
+    else:
+        run(args.input, args.generations)
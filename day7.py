@@ -1,22 +1,27 @@
 import argparse
+import bisect
 import functools
 import json
 import math
 import statistics
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--table', action='store_true')
+    parser.add_argument('--sweep', action='store_true')
+    parser.add_argument('--search', action='store_true')
 
     return parser.parse_args()
 
 
 def _read_data(input_file) -> typing.Dict[int, int]:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     pos_count = {}
 
@@ -61,12 +66,226 @@ def calculate_fuel_cost_arithmetic(sub_positions: typing.Dict[int, int], optimal
 
     for sub_pos, sub_count in sub_positions.items():
         pos_distance = abs(optimal_position - sub_pos)
-        pos_cost = (pos_distance + 1) / 2 * pos_distance
+        pos_cost = pos_distance * (pos_distance + 1) // 2
         fuel_cost += pos_cost * sub_count
 
     return fuel_cost
 
 
+def optimal_fuel_cost_linear(sub_positions: typing.Dict[int, int]) -> int:
+    optimal_position = calculate_optimal_position(sub_positions, calculate_fuel_cost_linear)
+
+    return calculate_fuel_cost_linear(sub_positions, optimal_position)
+
+
+def optimal_fuel_cost_arithmetic(sub_positions: typing.Dict[int, int]) -> int:
+    optimal_position = calculate_optimal_position(sub_positions, calculate_fuel_cost_arithmetic)
+
+    return calculate_fuel_cost_arithmetic(sub_positions, optimal_position)
+
+
+class CrabCost:
+    """
+    Fuel cost of moving one crab by a distance.
+
+    Costs that declare themselves convex can be minimised with a binary
+    search on the slope of the total cost.
+    """
+    convex = False
+
+    def __call__(self, distance: int) -> int:
+        raise NotImplementedError
+
+
+class LinearCost(CrabCost):
+    convex = True
+
+    def __call__(self, distance: int) -> int:
+        return distance
+
+
+class ArithmeticCost(CrabCost):
+    convex = True
+
+    def __call__(self, distance: int) -> int:
+        return distance * (distance + 1) // 2
+
+
+def calculate_fuel_cost(sub_positions: typing.Dict[int, int], position: int, crab_cost: CrabCost) -> int:
+    return sum(
+        crab_cost(abs(position - sub_pos)) * sub_count
+        for sub_pos, sub_count in sub_positions.items()
+    )
+
+
+def search_optimal_position(sub_positions: typing.Dict[int, int], crab_cost: CrabCost) -> int:
+    """
+    Find the rightmost position with the lowest total cost.
+
+    A sum of convex costs is convex, so the slope cost(x + 1) - cost(x) only
+    grows with x and the answer is the first position where it turns
+    positive, found in O(n log range) cost evaluations. Other costs fall
+    back to checking every position.
+    """
+    leftmost_pos = min(sub_positions.keys())
+    rightmost_pos = max(sub_positions.keys())
+
+    def total_cost(pos):
+        return calculate_fuel_cost(sub_positions, pos, crab_cost)
+
+    if not crab_cost.convex:
+        return min(
+            range(leftmost_pos, rightmost_pos + 1),
+            key=lambda pos: (total_cost(pos), -pos),
+        )
+
+    low, high = leftmost_pos, rightmost_pos
+
+    while low < high:
+        middle = (low + high) // 2
+
+        if total_cost(middle + 1) - total_cost(middle) > 0:
+            high = middle
+        else:
+            low = middle + 1
+
+    return low
+
+
+class FuelCostTable:
+    """
+    Prefix sums of crab counts, positions and squared positions in sorted
+    position order, giving both fuel costs at any position in O(log n)
+    """
+    def __init__(self, sub_positions: typing.Dict[int, int]):
+        self.positions = sorted(sub_positions)
+
+        self._counts = [0]
+        self._sums = [0]
+        self._squares = [0]
+
+        for pos in self.positions:
+            sub_count = sub_positions[pos]
+
+            self._counts.append(self._counts[-1] + sub_count)
+            self._sums.append(self._sums[-1] + sub_count * pos)
+            self._squares.append(self._squares[-1] + sub_count * pos * pos)
+
+    @property
+    def total_count(self) -> int:
+        return self._counts[-1]
+
+    def _linear_cost(self, pos: int, split: int) -> int:
+        """
+        split is the number of distinct crab positions left of pos
+        """
+        left_count, left_sum = self._counts[split], self._sums[split]
+        right_count = self._counts[-1] - left_count
+        right_sum = self._sums[-1] - left_sum
+
+        return (pos * left_count - left_sum) + (right_sum - pos * right_count)
+
+    def _arithmetic_cost(self, pos: int, split: int) -> int:
+        squared_distances = (
+            pos * pos * self._counts[-1]
+            - 2 * pos * self._sums[-1]
+            + self._squares[-1]
+        )
+
+        return (squared_distances + self._linear_cost(pos, split)) // 2
+
+    def linear_cost(self, pos: int) -> int:
+        return self._linear_cost(pos, bisect.bisect_left(self.positions, pos))
+
+    def arithmetic_cost(self, pos: int) -> int:
+        return self._arithmetic_cost(pos, bisect.bisect_left(self.positions, pos))
+
+    def sweep_costs(self) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        """
+        Yield (position, linear cost, arithmetic cost) for every position
+        between the leftmost and the rightmost crab, O(1) per position
+        """
+        split = 0
+
+        for pos in range(self.positions[0], self.positions[-1] + 1):
+            while split < len(self.positions) and self.positions[split] < pos:
+                split += 1
+
+            yield pos, self._linear_cost(pos, split), self._arithmetic_cost(pos, split)
+
+    @staticmethod
+    def _best(candidates: typing.Iterable[int], cost_fn) -> int:
+        # on a tie prefer the rightmost position, like calculate_optimal_position
+        return min(candidates, key=lambda pos: (cost_fn(pos), -pos))
+
+    def optimal_position_linear(self) -> int:
+        """
+        The linear cost is minimised at the median; the first position
+        holding more than half of the crabs is the rightmost minimum
+        """
+        split = bisect.bisect_right(self._counts, self.total_count // 2) - 1
+
+        return self.positions[split]
+
+    def optimal_position_arithmetic(self) -> int:
+        """
+        The arithmetic cost is minimised within half a step of the mean
+        """
+        mean_floor = self._sums[-1] // self.total_count
+
+        candidates = [
+            pos
+            for pos in range(mean_floor - 1, mean_floor + 3)
+            if self.positions[0] <= pos <= self.positions[-1]
+        ]
+
+        return self._best(candidates, self.arithmetic_cost)
+
+    def sweep_optimal_positions(self) -> typing.Tuple[int, int]:
+        """
+        Return the (linear, arithmetic) optimal positions from one sweep over
+        every candidate position
+        """
+        best_linear = best_arithmetic = None
+
+        for pos, linear_cost, arithmetic_cost in self.sweep_costs():
+            # on a tie prefer the rightmost position
+            if best_linear is None or linear_cost <= best_linear[1]:
+                best_linear = pos, linear_cost
+
+            if best_arithmetic is None or arithmetic_cost <= best_arithmetic[1]:
+                best_arithmetic = pos, arithmetic_cost
+
+        return best_linear[0], best_arithmetic[0]
+
+
+def run_table(input_file: str, sweep: bool = False) -> None:
+    table = FuelCostTable(_read_data(input_file))
+
+    if sweep:
+        pos_linear, pos_arithmetic = table.sweep_optimal_positions()
+    else:
+        pos_linear = table.optimal_position_linear()
+        pos_arithmetic = table.optimal_position_arithmetic()
+
+    print(f"optimal position - {pos_linear}")
+    print(f"total fuel expense - {table.linear_cost(pos_linear)}")
+
+    print(f"optimal position - {pos_arithmetic}")
+    print(f"total fuel expense - {table.arithmetic_cost(pos_arithmetic)}")
+
+
+def run_search(input_file: str) -> None:
+    sub_positions = _read_data(input_file)
+
+    for crab_cost in [LinearCost(), ArithmeticCost()]:
+        optimal_pos = search_optimal_position(sub_positions, crab_cost)
+        print(f"optimal position - {optimal_pos}")
+
+        fuel_expense = calculate_fuel_cost(sub_positions, optimal_pos, crab_cost)
+        print(f"total fuel expense - {fuel_expense}")
+
+
 def run(input_file: str) -> None:
     sub_positions = _read_data(input_file)
 
@@ -86,4 +305,9 @@ def run(input_file: str) -> None:
 if __name__ == '__main__':
     args = parse_args()
 
-    run(args.input)
+    if args.search:
+        run_search(args.input)
+    elif args.table or args.sweep:
+        run_table(args.input, args.sweep)
+    else:
+        run(args.input)
@@ -1,8 +1,11 @@
 import argparse
 import dataclasses
 import functools
+import itertools
 import typing
 
+import input_reader
+
 
 @dataclasses.dataclass
 class InputLine:
@@ -14,13 +17,14 @@ def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('input')
+    parser.add_argument('--bitmask', action='store_true')
+    parser.add_argument('--lookup', action='store_true')
 
     return parser.parse_args()
 
 
 def _read_data(input_file) -> typing.Iterator[InputLine]:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     for line in lines:
         digits, display = line.split(' | ')
@@ -41,6 +45,128 @@ def _read_data(input_file) -> typing.Iterator[InputLine]:
         )
 
 
+SEGMENTS = 'abcdefg'
+
+
+@dataclasses.dataclass
+class InputMasks:
+    digits: typing.List[int]
+    display: typing.List[int]
+
+
+def _pattern_mask(pattern: str) -> int:
+    mask = 0
+
+    for segment in pattern:
+        mask |= 1 << SEGMENTS.index(segment)
+
+    return mask
+
+
+def _read_masks(input_file) -> typing.Iterator[InputMasks]:
+    lines = input_reader.read_lines(input_file)
+
+    for line in lines:
+        digits, display = line.split(' | ')
+
+        yield InputMasks(
+            [_pattern_mask(d) for d in digits.split(' ')],
+            [_pattern_mask(d) for d in display.split(' ')],
+        )
+
+
+# (lit segments, segments shared with 1, segments shared with 4) -> digit
+DIGIT_SIGNATURES = {
+    (2, 2, 2): 1,
+    (3, 2, 2): 7,
+    (4, 2, 4): 4,
+    (7, 2, 4): 8,
+    (5, 1, 2): 2,
+    (5, 2, 3): 3,
+    (5, 1, 3): 5,
+    (6, 2, 4): 9,
+    (6, 2, 3): 0,
+    (6, 1, 3): 6,
+}
+
+
+def build_digit_table(digits: typing.List[int]) -> typing.List[typing.Optional[int]]:
+    """
+    Map every 7 bit pattern to its digit.
+
+    1 and 4 are the only patterns with 2 and 4 lit segments, and each digit
+    has a distinct signature of lit segments and segments shared with them.
+    """
+    one = next(d for d in digits if d.bit_count() == 2)
+    four = next(d for d in digits if d.bit_count() == 4)
+
+    digit_table = [None] * (1 << len(SEGMENTS))
+
+    for d in digits:
+        signature = (d.bit_count(), (d & one).bit_count(), (d & four).bit_count())
+        digit_table[d] = DIGIT_SIGNATURES.get(signature)
+
+    return digit_table
+
+
+def translate_display_masks(
+    digit_table: typing.List[typing.Optional[int]],
+    display: typing.List[int],
+) -> typing.List[int]:
+    return [
+        digit_table[d]
+        for d in display
+        if digit_table[d] is not None
+    ]
+
+
+# Segments lit for each digit on a correctly wired display
+STANDARD_DIGITS = [
+    'abcefg', 'cf', 'acdeg', 'acdfg', 'bcdf',
+    'abdfg', 'abdefg', 'acf', 'abcdefg', 'abcdfg',
+]
+
+
+@functools.lru_cache(maxsize=None)
+def wiring_table() -> typing.Dict[typing.Tuple[int, ...], typing.Dict[int, int]]:
+    """
+    Map every possible wiring to its digit decoding, built once.
+
+    A wiring is identified by the sorted masks of its ten unique patterns,
+    which does not depend on the order of the patterns or of the segments
+    within them. Per-segment occurrence counts are the same for every
+    wiring, so they can not be used as the key.
+    """
+    standard_masks = [_pattern_mask(d) for d in STANDARD_DIGITS]
+    table = {}
+
+    for wiring in itertools.permutations(range(len(SEGMENTS))):
+        wired_masks = [
+            sum(
+                1 << wiring[segment]
+                for segment in range(len(SEGMENTS))
+                if mask >> segment & 1
+            )
+            for mask in standard_masks
+        ]
+
+        table[tuple(sorted(wired_masks))] = {
+            mask: digit
+            for digit, mask in enumerate(wired_masks)
+        }
+
+    return table
+
+
+def lookup_digit_map(digits: typing.List[int]) -> typing.Dict[int, int]:
+    digit_map = wiring_table().get(tuple(sorted(digits)))
+
+    if digit_map is None:
+        raise ValueError('patterns do not match any wiring')
+
+    return digit_map
+
+
 def build_digit_map(digits: typing.List[str]) -> typing.Dict[str, int]:
     digit_map = {}
 
@@ -112,16 +238,33 @@ def translate_display(
     return display
 
 
-def run(input_file: str) -> None:
-    data = _read_data(input_file)
+def _decode_lines(input_file: str) -> typing.Iterator[typing.List[int]]:
+    for line in _read_data(input_file):
+        digit_map = build_digit_map(line.digits)
+        yield translate_display(digit_map, line.display)
 
-    outputs = []
 
-    for line in data:
-        digit_map = build_digit_map(line.digits)
-        display = translate_display(digit_map, line.display)
+def _decode_lines_bitmask(input_file: str) -> typing.Iterator[typing.List[int]]:
+    for line in _read_masks(input_file):
+        digit_table = build_digit_table(line.digits)
+        yield translate_display_masks(digit_table, line.display)
+
+
+def _decode_lines_lookup(input_file: str) -> typing.Iterator[typing.List[int]]:
+    for line in _read_masks(input_file):
+        digit_map = lookup_digit_map(line.digits)
+        yield [digit_map[d] for d in line.display if d in digit_map]
+
+
+def run(input_file: str, bitmask: bool = False, lookup: bool = False) -> None:
+    if lookup:
+        decode_lines = _decode_lines_lookup
+    elif bitmask:
+        decode_lines = _decode_lines_bitmask
+    else:
+        decode_lines = _decode_lines
 
-        outputs.append(display)
+    outputs = list(decode_lines(input_file))
 
     print('digit counts: ')
     print(len([
@@ -144,4 +287,4 @@ def run(input_file: str) -> None:
 if __name__ == '__main__':
     args = parse_args()
 
-    run(args.input)
+    run(args.input, args.bitmask, args.lookup)
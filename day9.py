@@ -4,6 +4,8 @@ import itertools
 import math
 import typing
 
+import input_reader
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -42,8 +44,7 @@ class Field:
 
 
 def _read_data(input_file) -> Field:
-    with open(input_file) as _input:
-        lines = _input.read().splitlines()
+    lines = input_reader.read_lines(input_file)
 
     pillars = []
 
@@ -0,0 +1,77 @@
+import mmap
+import os
+import typing
+
+
+def chunk_ranges(input_file: str, chunk_size: int) -> typing.List[typing.Tuple[int, int]]:
+    """
+    Split a file into byte ranges of roughly chunk_size, ending on line breaks.
+    """
+    file_size = os.path.getsize(input_file)
+
+    if file_size == 0:
+        return []
+
+    ranges = []
+
+    with open(input_file, 'rb') as _input:
+        with mmap.mmap(_input.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            range_start = 0
+
+            while range_start < file_size:
+                range_end = data.find(b'\n', min(range_start + chunk_size, file_size) - 1)
+                range_end = file_size if range_end == -1 else range_end + 1
+
+                ranges.append((range_start, range_end))
+                range_start = range_end
+
+    return ranges
+
+
+def read_byte_lines(
+    input_file: str,
+    range_start: int = 0,
+    range_end: typing.Optional[int] = None,
+) -> typing.Iterator[memoryview]:
+    """
+    Lazily yield the lines of a memory-mapped file, without line endings.
+
+    Lines are memoryview slices of the mapping, so nothing is copied. Each
+    view is released as soon as the next line is requested; callers that
+    keep a line around must copy it with bytes() first. A byte range from
+    chunk_ranges limits the lines to that part of the file.
+    """
+    with open(input_file, 'rb') as _input:
+        if os.fstat(_input.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(_input.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                data_size = len(data) if range_end is None else range_end
+                line_start = range_start
+
+                while line_start < data_size:
+                    line_end = data.find(b'\n', line_start, data_size)
+
+                    if line_end == -1:
+                        line_end = data_size
+
+                    next_line_start = line_end + 1
+
+                    if line_end > line_start and view[line_end - 1] == ord('\r'):
+                        line_end -= 1
+
+                    # the mapping cannot be closed while a view is exported
+                    with view[line_start:line_end] as line:
+                        yield line
+
+                    line_start = next_line_start
+
+
+def read_lines(
+    input_file: str,
+    range_start: int = 0,
+    range_end: typing.Optional[int] = None,
+) -> typing.Iterator[str]:
+    for line in read_byte_lines(input_file, range_start, range_end):
+        yield str(line, 'utf-8')
@@ -0,0 +1,220 @@
+import argparse
+import contextlib
+import dataclasses
+import datetime
+import functools
+import importlib
+import inspect
+import json
+import os
+import platform
+import statistics
+import time
+import types
+import typing
+
+
+@dataclasses.dataclass
+class Solver:
+    """
+    Names of the functions timed for a day.
+
+    `parse` maps the input file to parsed data and each of `parts` maps the
+    parsed data to a puzzle answer. Days that only expose a whole-puzzle
+    entry point name it in `solve`; it takes the input file, so its timing
+    includes parsing and both puzzle parts.
+    """
+    parse: typing.Optional[str] = '_read_data'
+    parts: typing.Sequence[typing.Union[str, typing.Tuple[str, typing.Dict]]] = ()
+    solve: typing.Optional[str] = None
+
+
+# Days that do not follow the `_read_data` + `run` layout
+SOLVERS = {
+    1: Solver(parts=[
+        ('count_window_increases', {'window_widths': [1]}),
+        ('count_window_increases', {'window_widths': [3]}),
+    ]),
+    2: Solver('read_input', parts=['final_position_no_aim', 'final_position_with_aim']),
+    3: Solver('read_reports', parts=['power_rate', 'support_rating']),
+    4: Solver(parts=['find_winning_score', 'find_losing_score']),
+    5: Solver(solve='find_thermal_vents'),
+    6: Solver(parts=[
+        ('emulate_generations', {'generations': 80}),
+        ('emulate_generations', {'generations': 256}),
+    ]),
+    7: Solver(parts=['optimal_fuel_cost_linear', 'optimal_fuel_cost_arithmetic']),
+    21: Solver(None, parts=['part1', 'part2']),
+}
+
+DEFAULT_SOLVER = Solver(solve='run')
+
+DAYS = range(1, 22)
+
+# Days with the puzzle input hard-coded in the module
+NO_INPUT_DAYS = {21}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('input_dir')
+    parser.add_argument('--days', type=int, nargs='+', default=list(DAYS))
+    parser.add_argument('--input-pattern', default='day{day}.txt')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--verbose', action='store_true')
+
+    return parser.parse_args()
+
+
+@dataclasses.dataclass
+class Phase:
+    name: str
+    fn: typing.Callable
+    # parse function whose result is passed to fn, called outside the timing
+    parse_fn: typing.Optional[typing.Callable] = None
+    includes_parse: bool = False
+
+
+def find_phases(day: int) -> typing.List[Phase]:
+    module = importlib.import_module(f'day{day}')
+    solver = SOLVERS.get(day, DEFAULT_SOLVER)
+
+    parse_fn = getattr(module, solver.parse) if solver.parse is not None else None
+    phases = []
+
+    if parse_fn is not None:
+        phases.append(Phase('parse', parse_fn))
+
+    for part, part_fn in enumerate(solver.parts, start=1):
+        if isinstance(part_fn, tuple):
+            part_fn, kwargs = part_fn
+            fn = functools.partial(getattr(module, part_fn), **kwargs)
+        else:
+            fn = getattr(module, part_fn)
+
+        phases.append(Phase(f'part{part}', fn, parse_fn))
+
+    if solver.solve is not None:
+        phases.append(Phase('solve', getattr(module, solver.solve), includes_parse=True))
+
+    return phases
+
+
+def _call(fn: typing.Callable, *args):
+    result = fn(*args)
+
+    # lazy parsers only do their work once consumed
+    if isinstance(result, types.GeneratorType):
+        result = list(result)
+
+    return result
+
+
+def _phase_args(phase: Phase, input_file: str) -> typing.Tuple:
+    if phase.parse_fn is not None:
+        # parts may mutate what they are given, so every call gets fresh data
+        data = _call(phase.parse_fn, input_file)
+
+        # parsers returning several values, like day 4, are passed on unpacked
+        return data if isinstance(data, tuple) else (data,)
+
+    if inspect.signature(phase.fn).parameters:
+        return (input_file,)
+
+    return ()
+
+
+def time_phase(phase: Phase, input_file: str, repeat: int, verbose: bool) -> typing.Dict:
+    wall_times = []
+    cpu_times = []
+
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull:
+            output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)
+
+            with output:
+                args = _phase_args(phase, input_file)
+
+                wall_start = time.perf_counter()
+                cpu_start = time.process_time()
+
+                _call(phase.fn, *args)
+
+                cpu_times.append(time.process_time() - cpu_start)
+                wall_times.append(time.perf_counter() - wall_start)
+
+    return {
+        'includes_parse': phase.includes_parse,
+        'wall': wall_times,
+        'cpu': cpu_times,
+        'wall_min': min(wall_times),
+        'wall_median': statistics.median(wall_times),
+        'cpu_min': min(cpu_times),
+        'cpu_median': statistics.median(cpu_times),
+    }
+
+
+def run_day(day: int, input_file: str, repeat: int, verbose: bool = False) -> typing.Dict:
+    phases = {}
+
+    for phase in find_phases(day):
+        phases[phase.name] = time_phase(phase, input_file, repeat, verbose)
+
+    return {
+        'day': day,
+        'input': input_file,
+        'phases': phases,
+    }
+
+
+def run(
+    input_dir: str,
+    days: typing.Iterable[int],
+    input_pattern: str,
+    repeat: int,
+    verbose: bool = False,
+) -> typing.Dict:
+    results = []
+
+    for day in days:
+        input_file = os.path.join(input_dir, input_pattern.format(day=day))
+
+        if day not in NO_INPUT_DAYS and not os.path.exists(input_file):
+            print(f'day {day} - no input at {input_file}, skipping')
+            continue
+
+        result = run_day(day, input_file, repeat, verbose)
+        results.append(result)
+
+        for phase, timings in result['phases'].items():
+            print(
+                f'day {day} {phase} - '
+                f'wall {timings["wall_min"]:.6f}s, cpu {timings["cpu_min"]:.6f}s'
+                + (' (includes parse)' if timings['includes_parse'] else '')
+            )
+
+    return {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    report = run(
+        args.input_dir,
+        args.days,
+        args.input_pattern,
+        args.repeat,
+        args.verbose,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)